@@ -0,0 +1,85 @@
+"""Deterministic synthetic ledgers in the tracker's data file schema
+
+    python benchmarks/generate_ledger.py 1M data
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from storage import STORAGE_TYPES, storage_path  # noqa: E402
+
+EXPENSE_CATEGORIES = ["Food", "Transportation", "Entertainment", "Utilities", "Healthcare", "Shopping", "Other"]
+INCOME_CATEGORIES = ["Salary", "Investment"]
+MERCHANTS = {
+    "Food": ["Grocery Mart", "Corner Cafe", "Pizza Place", "Farmers Market", "Sushi Bar"],
+    "Transportation": ["City Metro", "Fuel Station", "Ride Share", "Parking Garage"],
+    "Entertainment": ["Cinema", "Streaming Service", "Concert Hall", "Bookshop"],
+    "Utilities": ["Power Company", "Water Board", "Internet Provider", "Phone Carrier"],
+    "Healthcare": ["Pharmacy", "Dental Clinic", "Family Doctor"],
+    "Shopping": ["Online Store", "Department Store", "Hardware Shop", "Shoe Outlet"],
+    "Other": ["Bank Fee", "Gift", "Charity Donation"],
+    "Salary": ["Employer Payroll"],
+    "Investment": ["Dividend", "Interest Payment", "Broker Transfer"],
+}
+
+
+def parse_size(text):
+    """Parse sizes such as 10k, 1M or 250000"""
+    text = text.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * multiplier)
+
+
+def generate_ledger(rows, seed=0, years=10):
+    """Build a ledger of `rows` transactions; the same seed always gives the same data"""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2015-01-01")
+    seconds = np.sort(rng.integers(0, years * 365 * 86400, rows))
+    dates = start + pd.to_timedelta(seconds, unit="s")
+
+    is_income = rng.random(rows) < 0.08
+    categories = np.where(is_income,
+                          rng.choice(INCOME_CATEGORIES, rows),
+                          rng.choice(EXPENSE_CATEGORIES, rows))
+    descriptions = np.empty(rows, dtype=object)
+    for category, merchants in MERCHANTS.items():
+        mask = categories == category
+        descriptions[mask] = rng.choice(merchants, mask.sum())
+
+    cents = np.round(rng.lognormal(3.0, 1.0, rows) * 100).astype('int64') + 1
+    cents = np.where(is_income, cents * 20, -cents)
+
+    return pd.DataFrame({
+        'date': dates,
+        'description': descriptions,
+        'category': categories,
+        'amount_cents': cents,
+        'type': np.where(is_income, 'income', 'expense'),
+    }, index=pd.RangeIndex(1, rows + 1, name='id'))
+
+
+def write_ledger(data_folder, rows, storage="csv", seed=0):
+    """Write a generated ledger as the data file of data_folder"""
+    os.makedirs(data_folder, exist_ok=True)
+    path = storage_path(data_folder, storage)
+    STORAGE_TYPES[storage](path).write(generate_ledger(rows, seed))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic finance tracker data file")
+    parser.add_argument("size", help="number of transactions, e.g. 10k, 1M")
+    parser.add_argument("data_folder")
+    parser.add_argument("--storage", choices=sorted(STORAGE_TYPES), default="csv")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(write_ledger(args.data_folder, parse_size(args.size), args.storage, args.seed))
+
+
+if __name__ == "__main__":
+    main()
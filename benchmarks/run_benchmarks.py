@@ -0,0 +1,259 @@
+"""Time the tracker's hot paths on synthetic ledgers and write the results as JSON
+
+    python benchmarks/run_benchmarks.py --sizes 10k,100k --output bench.json
+    python benchmarks/run_benchmarks.py --sizes 10k,100k --compare bench.json
+
+GUI cases run against a withdrawn Tk root. Without a display the charts
+are still drawn on an Agg canvas; only the transaction list cases are
+reported as skipped.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import matplotlib  # noqa: E402
+
+matplotlib.use("Agg")
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from generate_ledger import parse_size, write_ledger  # noqa: E402
+from ledger import Ledger  # noqa: E402
+from storage import STORAGE_TYPES  # noqa: E402
+
+CHART_TYPES = ["Monthly Expenses", "Category Breakdown", "Income vs Expenses", "Monthly Income", "Balance Over Time"]
+
+
+def measure(func, repeats):
+    """Median wall time of func() over repeats runs"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+class Results:
+    def __init__(self):
+        self.cases = []
+
+    def add(self, size, case, seconds, **extra):
+        self.cases.append({'size': size, 'case': case, 'seconds': seconds, **extra})
+        print(f"{size:>10}  {case:<40} {seconds * 1000:12.3f} ms", file=sys.stderr)
+
+    def skip(self, size, case, reason):
+        self.cases.append({'size': size, 'case': case, 'seconds': None, 'skipped': reason})
+        print(f"{size:>10}  {case:<40}      skipped ({reason})", file=sys.stderr)
+
+
+def bench_ledger(folder, size, storage, repeats, results):
+    """Engine paths: load, save, add and delete"""
+    ledger = Ledger(folder)
+    results.add(size, f"load_data/{storage}", measure(lambda: ledger.install(ledger.read()), repeats))
+    results.add(size, f"save_data/{storage}", measure(ledger.save, repeats))
+
+    # Per-transaction cost, averaged over a batch of adds
+    adds = 50
+    start = time.perf_counter()
+    for i in range(adds):
+        ledger.add(f"Benchmark {i}", "Food", 1250, "expense")
+    results.add(size, f"add_transaction/{storage}", (time.perf_counter() - start) / adds, ops=adds)
+
+    ids = ledger.df.index.to_numpy()
+    rng = np.random.default_rng(1)
+    deletes = 20
+    start = time.perf_counter()
+    for transaction_id in rng.choice(ids, deletes, replace=False):
+        ledger.delete([transaction_id])
+    results.add(size, f"delete_transaction/{storage}", (time.perf_counter() - start) / deletes, ops=deletes)
+
+    bulk = rng.choice(ledger.df.index.to_numpy(), min(1000, len(ledger.df) // 2), replace=False)
+    results.add(size, f"delete_transaction/bulk/{storage}", measure(lambda: ledger.delete(bulk), 1), ops=len(bulk))
+
+    results.add(size, f"list_order/{storage}", measure(lambda: (setattr(ledger, '_date_order', None),
+                                                     ledger.list_order()), repeats))
+    results.add(size, f"list_order/category/{storage}", measure(lambda: ledger.list_order("Food"), repeats))
+    results.add(size, f"list_order/search/{storage}", measure(lambda: ledger.list_order(search="mart"), repeats))
+    results.add(size, f"list_order/combined/{storage}",
+                measure(lambda: ledger.list_order("Food", "mart", "2020-01-01", "2020-12-31"), repeats))
+    ledger.compact()
+
+
+def open_gui(folder):
+    """FinanceTracker on a withdrawn Tk root with its data loaded, or None without a display"""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception:
+        return None, None
+    root.withdraw()
+
+    from finance_tracker import FinanceTracker
+    app = FinanceTracker(root, folder)
+    while not app.ledger.loaded:
+        root.update()
+        time.sleep(0.01)
+    return root, app
+
+
+def open_charts(folder):
+    """FinanceTracker with only its chart state, drawing on an Agg canvas, or None without tkinter
+
+    The Tk widgets are never created, so the chart data and the
+    create_*_chart builders can be timed without a display.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    try:
+        from finance_tracker import FinanceTracker
+    except ImportError:
+        return None
+
+    app = FinanceTracker.__new__(FinanceTracker)
+    app.ledger = Ledger(folder).load()
+    app.figure = Figure(figsize=(10, 6), dpi=80)
+    app.canvas = FigureCanvasAgg(app.figure)
+    app.toolbar = SimpleNamespace(update=lambda: None)
+    app.chart_state = None
+    app.balance_line = None
+    app._balance_zoom = None
+    app._rescaling = False
+    return app
+
+
+def bench_gui(folder, size, repeats, results):
+    """GUI paths: transaction list refresh and every chart type"""
+    root, app = open_gui(folder)
+    if app is None:
+        for case in ["update_transaction_list", "update_transaction_list/category"]:
+            results.skip(size, case, "no display")
+        app = open_charts(folder)
+        if app is None:
+            for chart_type in CHART_TYPES:
+                results.skip(size, f"update_chart/{chart_type}", "no tkinter")
+                results.skip(size, f"update_chart/{chart_type}/refresh", "no tkinter")
+            return
+        bench_charts(app, 800, size, repeats, results)
+        return
+
+    def refresh_list(category):
+        app.filter_var.set(category)
+        app._list_key = None
+        app.ledger._date_order = None
+        app.update_transaction_list()
+
+    results.add(size, "update_transaction_list", measure(lambda: refresh_list("All"), repeats))
+    results.add(size, "update_transaction_list/category", measure(lambda: refresh_list("Food"), repeats))
+    # draw_idle is deferred under Tk, so refreshes render explicitly to time the whole refresh
+    bench_charts(app, app.chart_width(), size, repeats, results, render=lambda: app.canvas.draw())
+
+    app.worker.shutdown()
+    root.destroy()
+
+
+def bench_charts(app, width, size, repeats, results, render=lambda: None):
+    """Every chart type, rebuilt and refreshed in place
+
+    Charts are prepared and drawn synchronously here rather than through the worker.
+    """
+    for chart_type in CHART_TYPES:
+        def draw(rebuild):
+            data = app.get_chart_data(app.chart_source(chart_type), chart_type, width)
+            if rebuild:
+                app.chart_state = None
+            app.draw_chart(chart_type, data)
+            if not rebuild:
+                render()
+        results.add(size, f"update_chart/{chart_type}", measure(lambda: draw(True), repeats))
+        # Same months and categories again: the existing artists are updated in place
+        results.add(size, f"update_chart/{chart_type}/refresh", measure(lambda: draw(False), repeats))
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline_file):
+    """Print the ratio of each timing to the same case in a previous run"""
+    with open(baseline_file) as f:
+        baseline = {(c['size'], c['case']): c['seconds'] for c in json.load(f)['results']}
+    print(f"{'size':>10}  {'case':<40} {'before ms':>12} {'after ms':>12} {'ratio':>8}")
+    for case in results:
+        before = baseline.get((case['size'], case['case']))
+        after = case['seconds']
+        if before is None or after is None:
+            continue
+        ratio = after / before if before else float('inf')
+        print(f"{case['size']:>10}  {case['case']:<40} {before * 1000:12.3f} {after * 1000:12.3f} {ratio:8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the finance tracker on synthetic data")
+    parser.add_argument("--sizes", default="10k,100k", help="comma separated ledger sizes, e.g. 10k,100k,1M,10M")
+    parser.add_argument("--storage", default="csv", help=f"comma separated storage formats ({', '.join(STORAGE_TYPES)})")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--no-gui", action="store_true", help="skip the Tk list and chart cases")
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--keep-data", help="generate the ledgers in this folder and keep them")
+    args = parser.parse_args()
+
+    results = Results()
+    work_dir = args.keep_data or tempfile.mkdtemp(prefix="finance-bench-")
+    try:
+        for size_text in args.sizes.split(","):
+            size = parse_size(size_text)
+            for storage in args.storage.split(","):
+                folder = os.path.join(work_dir, f"{size}-{storage}")
+                shutil.rmtree(folder, ignore_errors=True)
+                write_ledger(folder, size, storage)
+                bench_ledger(folder, size, storage, args.repeats, results)
+            if not args.no_gui:
+                folder = os.path.join(work_dir, f"{size}-gui")
+                shutil.rmtree(folder, ignore_errors=True)
+                write_ledger(folder, size)
+                bench_gui(folder, size, args.repeats, results)
+    finally:
+        if not args.keep_data:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+        },
+        'results': results.cases,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    elif not args.compare:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        compare(results.cases, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+import numpy as np
+import pandas as pd
+
+
+def _accumulate(sums, counts, key, amount, count):
+    """Add amount/count to a keyed total, dropping keys with no transactions left"""
+    new_count = counts.get(key, 0) + count
+    if new_count:
+        counts[key] = new_count
+        sums[key] = sums.get(key, 0) + amount
+    else:
+        counts.pop(key, None)
+        sums.pop(key, None)
+
+
+class LedgerTotals:
+    """Balance, income, expense and per-category totals kept up to date incrementally
+
+    The totals are computed once from the full DataFrame and then adjusted
+    for each added or removed transaction, so the balance panel never has
+    to rescan the ledger. All totals are exact integer cents; amounts carry
+    their sign, so income is simply the sum of the positive amounts.
+    """
+
+    def __init__(self, df=None):
+        self.reset()
+        if df is not None:
+            self.rebuild(df)
+
+    def reset(self):
+        self.total = 0
+        self.income = 0
+        self.by_category = {}
+        self.category_counts = {}
+
+    @property
+    def expenses(self):
+        """Expenses as a positive number of cents"""
+        return self.income - self.total
+
+    def rebuild(self, df):
+        """Recompute every total from scratch"""
+        self.reset()
+        self.add_rows(df)
+
+    def add(self, amount_cents, category, sign=1):
+        """Account for a single transaction; sign=-1 removes it again"""
+        self.total += sign * amount_cents
+        if amount_cents > 0:
+            self.income += sign * amount_cents
+        _accumulate(self.by_category, self.category_counts, category, sign * amount_cents, sign)
+
+    def remove(self, amount_cents, category):
+        self.add(amount_cents, category, sign=-1)
+
+    def add_rows(self, rows, sign=1):
+        """Account for a batch of transactions with vectorized integer sums"""
+        if len(rows) == 0:
+            return
+        cents = rows['amount_cents'].to_numpy(dtype='int64')
+        self.total += sign * int(cents.sum())
+        self.income += sign * int(cents[cents > 0].sum())
+        grouped = rows.groupby('category', observed=True)['amount_cents'].agg(['sum', 'count'])
+        for category, (amount, count) in grouped.iterrows():
+            _accumulate(self.by_category, self.category_counts, category, sign * int(amount), sign * int(count))
+
+    def remove_rows(self, rows):
+        self.add_rows(rows, sign=-1)
+
+    def check(self, df):
+        """Debug check that the running totals match a full recompute"""
+        expected = LedgerTotals(df)
+        problems = []
+        for name in ('total', 'income'):
+            if getattr(self, name) != getattr(expected, name):
+                problems.append(f"{name}: {getattr(self, name)} != {getattr(expected, name)}")
+        if self.category_counts != expected.category_counts:
+            problems.append(f"category counts: {self.category_counts} != {expected.category_counts}")
+        if self.by_category != expected.by_category:
+            problems.append(f"category totals: {self.by_category} != {expected.by_category}")
+        if problems:
+            raise AssertionError("Running totals out of sync: " + "; ".join(problems))
+
+
+class MonthlyRollup:
+    """Amount totals in cents per (month, category, type) cell, shared by all chart builders
+
+    Built once from the full DataFrame; adding or deleting a transaction
+    only touches its own cell, so charts read a table whose size depends on
+    the number of months and categories rather than on the number of rows.
+    """
+
+    def __init__(self, df=None):
+        self.reset()
+        if df is not None:
+            self.rebuild(df)
+
+    def reset(self):
+        self.cells = {}
+        self.counts = {}
+
+    def copy(self):
+        rollup = MonthlyRollup()
+        rollup.cells = dict(self.cells)
+        rollup.counts = dict(self.counts)
+        return rollup
+
+    def rebuild(self, df):
+        """Recompute every cell from scratch"""
+        self.reset()
+        self.add_rows(df)
+
+    def add(self, date, category, transaction_type, amount_cents, sign=1):
+        """Account for a single transaction; sign=-1 removes it again"""
+        key = (pd.Period(date, 'M'), category, transaction_type)
+        _accumulate(self.cells, self.counts, key, sign * amount_cents, sign)
+
+    def remove(self, date, category, transaction_type, amount_cents):
+        self.add(date, category, transaction_type, amount_cents, sign=-1)
+
+    def add_rows(self, rows, sign=1):
+        """Account for a batch of transactions with one groupby"""
+        if len(rows) == 0:
+            return
+        grouped = rows.groupby([rows['date'].dt.to_period('M'), 'category', 'type'],
+                               observed=True)['amount_cents'].agg(['sum', 'count'])
+        for key, (amount, count) in grouped.iterrows():
+            _accumulate(self.cells, self.counts, key, sign * int(amount), sign * int(count))
+
+    def remove_rows(self, rows):
+        self.add_rows(rows, sign=-1)
+
+    def _sum_by(self, level, transaction_type):
+        totals = {}
+        for key, amount in self.cells.items():
+            if key[2] == transaction_type:
+                totals[key[level]] = totals.get(key[level], 0) + amount
+        return pd.Series(totals, dtype='int64').sort_index()
+
+    def monthly(self, transaction_type):
+        """Signed totals in cents of one transaction type per month, oldest month first"""
+        series = self._sum_by(0, transaction_type)
+        series.index = pd.PeriodIndex(series.index, freq='M', name='month')
+        return series
+
+    def by_category(self, transaction_type):
+        """Signed totals in cents of one transaction type per category"""
+        series = self._sum_by(1, transaction_type)
+        series.index.name = 'category'
+        return series
+
+    def check(self, df):
+        """Debug check that the cached cells match a full recompute"""
+        expected = MonthlyRollup(df)
+        if self.counts != expected.counts:
+            raise AssertionError("Monthly rollup out of sync: transaction counts differ")
+        for key, amount in expected.cells.items():
+            if self.cells[key] != amount:
+                raise AssertionError(f"Monthly rollup out of sync for {key}: {self.cells[key]} != {amount}")
+
+
+class BalanceSeries:
+    """Running balance over time: transactions sorted by date with a cached cumulative sum
+
+    The arrays live in buffers with spare capacity, so adding a transaction
+    dated after all others (the normal case) appends in place and extends
+    the cumulative sum by one element. Anything else rebuilds the sorted
+    arrays into new buffers, which leaves earlier snapshots untouched.
+    """
+
+    def __init__(self, df=None):
+        self.reset()
+        if df is not None:
+            self.rebuild(df)
+
+    def reset(self):
+        self._set(np.empty(0, dtype='int64'), np.empty(0, dtype='int64'), np.empty(0, dtype='int64'))
+
+    def _set(self, dates, ids, amounts):
+        self.size = len(dates)
+        capacity = max(16, self.size * 2)
+        self._dates = np.empty(capacity, dtype='int64')
+        self._ids = np.empty(capacity, dtype='int64')
+        self._amounts = np.empty(capacity, dtype='int64')
+        self._cumulative = np.empty(capacity, dtype='int64')
+        self._dates[:self.size] = dates
+        self._ids[:self.size] = ids
+        self._amounts[:self.size] = amounts
+        np.cumsum(amounts, out=self._cumulative[:self.size])
+
+    def rebuild(self, df):
+        """Recompute the sorted arrays from scratch"""
+        dates = df['date'].to_numpy(dtype='datetime64[ns]').view('int64')
+        order = np.argsort(dates, kind='stable')
+        self._set(dates[order], df.index.to_numpy(dtype='int64')[order],
+                  df['amount_cents'].to_numpy(dtype='int64')[order])
+
+    def add(self, date, transaction_id, amount_cents):
+        """Account for a single transaction"""
+        date = pd.Timestamp(date).as_unit('ns').value
+        if self.size and date < self._dates[self.size - 1]:
+            self._merge(np.array([date]), np.array([transaction_id]), np.array([amount_cents]))
+            return
+        if self.size == len(self._dates):
+            self._set(self._dates[:self.size], self._ids[:self.size], self._amounts[:self.size])
+        i = self.size
+        self._dates[i] = date
+        self._ids[i] = transaction_id
+        self._amounts[i] = amount_cents
+        self._cumulative[i] = (self._cumulative[i - 1] if i else 0) + amount_cents
+        self.size += 1
+
+    def add_rows(self, rows):
+        """Account for a batch of transactions"""
+        if len(rows):
+            self._merge(rows['date'].to_numpy(dtype='datetime64[ns]').view('int64'),
+                        rows.index.to_numpy(dtype='int64'), rows['amount_cents'].to_numpy(dtype='int64'))
+
+    def _merge(self, dates, ids, amounts):
+        dates = np.concatenate((self._dates[:self.size], dates))
+        order = np.argsort(dates, kind='stable')
+        self._set(dates[order], np.concatenate((self._ids[:self.size], ids))[order],
+                  np.concatenate((self._amounts[:self.size], amounts))[order])
+
+    def remove_ids(self, ids):
+        keep = ~np.isin(self._ids[:self.size], np.asarray(ids, dtype='int64'))
+        self._set(self._dates[:self.size][keep], self._ids[:self.size][keep], self._amounts[:self.size][keep])
+
+    def snapshot(self):
+        """(dates as int64 ns, balance in cents) views that later changes never modify"""
+        return self._dates[:self.size], self._cumulative[:self.size]
+
+    def check(self, df):
+        """Debug check that the cached series matches a full recompute"""
+        expected = BalanceSeries(df)
+        dates, balance = self.snapshot()
+        expected_dates, expected_balance = expected.snapshot()
+        if not (np.array_equal(dates, expected_dates) and np.array_equal(balance, expected_balance)):
+            raise AssertionError("Balance series out of sync")
@@ -0,0 +1,167 @@
+"""Command-line access to the finance tracker data, without a display
+
+    python src/cli.py balance
+    python src/cli.py report --by month
+    python src/cli.py report --by category --from 2024-01-01 --to 2024-12-31
+    python src/cli.py list --search coffee --limit 10
+    python src/cli.py import statement.csv
+    python src/cli.py export backup.csv
+    python src/cli.py export food-2024.csv.gz --category Food --from 2024-01-01 --to 2024-12-31
+"""
+import argparse
+import sys
+
+import pandas as pd
+
+from export import EXPORT_FORMATS
+from ledger import Ledger
+from money import format_cents, parse_cents
+from storage import STORAGE_TYPES, migrate
+
+
+def print_balance(ledger, args):
+    totals = ledger.totals
+    print(f"Balance:  {format_cents(totals.total)}")
+    print(f"Income:   {format_cents(totals.income)}")
+    print(f"Expenses: {format_cents(totals.expenses)}")
+
+
+def print_report(ledger, args):
+    rollup = ledger.rollup
+    if args.by == "category":
+        income = rollup.by_category('income')
+        expenses = rollup.by_category('expense').abs()
+        label = "Category"
+    else:
+        income = rollup.monthly('income')
+        expenses = rollup.monthly('expense').abs()
+        label = "Month"
+
+    keys = sorted(set(income.index) | set(expenses.index), key=str)
+    width = max([len(label)] + [len(str(key)) for key in keys])
+    print(f"{label:<{width}}  {'Income':>12}  {'Expenses':>12}  {'Net':>12}")
+    for key in keys:
+        inc = income.get(key, 0)
+        exp = expenses.get(key, 0)
+        print(f"{str(key):<{width}}  {format_cents(inc):>12}  {format_cents(exp):>12}  {format_cents(inc - exp):>12}")
+
+
+def list_transactions(ledger, args):
+    rows = ledger.find(args.category, args.search, args.start, args.end, args.limit)
+    for transaction_id, row in zip(rows.index, rows.itertuples(index=False)):
+        print(f"{transaction_id:>8}  {row.date:%Y-%m-%d}  {row.description[:30]:<30}  {row.category:<15}"
+              f"  {format_cents(row.amount_cents):>12}")
+
+
+def add_transaction(ledger, args):
+    transaction_type = "income" if args.income else "expense"
+    transaction_id = ledger.add(args.description, args.category, args.amount, transaction_type)
+    print(f"Added transaction {transaction_id}")
+
+
+def import_statement(ledger, args):
+    report = ledger.import_statement(args.file)
+    print(report.summary())
+    if report.error is not None:
+        print(f"Error importing data: {report.error}", file=sys.stderr)
+        return 1
+
+
+def export_data(ledger, args):
+    progress = None
+    if sys.stderr.isatty():
+        progress = lambda text: print(text, end="\r", file=sys.stderr)
+    rows = ledger.export(args.file, args.category, args.search, progress=progress)
+    if progress is not None:
+        print(file=sys.stderr)
+    print(f"Exported {rows} transactions to {args.file}")
+
+
+def compact(ledger, args):
+    records = ledger.journal.records
+    ledger.compact()
+    print(f"Folded {records} journal records into {ledger.storage.path}")
+
+
+def amount(text):
+    """Dollar amount argument, parsed exactly into cents"""
+    return parse_cents(text)
+
+
+def date(text):
+    """YYYY-MM-DD date argument"""
+    return pd.Timestamp(text)
+
+
+def add_date_range(parser):
+    parser.add_argument("--from", dest="start", type=date, help="only include transactions from this date")
+    parser.add_argument("--to", dest="end", type=date, help="only include transactions up to this date")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Personal Finance Tracker command line")
+    parser.add_argument("--data-folder", default="data", help="folder holding the data file (default: data)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    balance = commands.add_parser("balance", help="print the current balance")
+    add_date_range(balance)
+    balance.set_defaults(func=print_balance)
+
+    report = commands.add_parser("report", help="print income and expenses per month or category")
+    report.add_argument("--by", choices=["month", "category"], default="month")
+    add_date_range(report)
+    report.set_defaults(func=print_report)
+
+    list_parser = commands.add_parser("list", help="list transactions, newest first")
+    list_parser.add_argument("--category")
+    list_parser.add_argument("--search", help="text contained in the description")
+    list_parser.add_argument("--limit", type=int, default=20, help="number of transactions to list (default: 20)")
+    add_date_range(list_parser)
+    # Filtered in the database when the data is stored in SQLite
+    list_parser.set_defaults(func=list_transactions, load=False)
+
+    add = commands.add_parser("add", help="add a transaction")
+    add.add_argument("description")
+    add.add_argument("category")
+    add.add_argument("amount", type=amount, help="amount in dollars, e.g. 12.50")
+    add.add_argument("--income", action="store_true", help="record income instead of an expense")
+    add.set_defaults(func=add_transaction)
+
+    import_parser = commands.add_parser("import", help="import a bank statement CSV")
+    import_parser.add_argument("file")
+    import_parser.set_defaults(func=import_statement)
+
+    export = commands.add_parser("export", help="export transactions to CSV, compressed CSV, Feather or Parquet")
+    export.add_argument("file", help="the format follows the name: " + ", ".join(EXPORT_FORMATS))
+    export.add_argument("--category")
+    export.add_argument("--search", help="text contained in the description")
+    add_date_range(export)
+    export.set_defaults(func=export_data)
+
+    commands.add_parser("compact", help="fold the journal into the data file").set_defaults(func=compact)
+
+    migrate_parser = commands.add_parser("migrate", help="convert the data file to another storage format")
+    migrate_parser.add_argument("target", choices=sorted(STORAGE_TYPES))
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "migrate":
+        storage = migrate(args.data_folder, args.target)
+        print(f"Data stored in {storage.path}")
+        return 0
+
+    # Only reads accept a date range, so only they load part of the data
+    ledger = Ledger(args.data_folder, start=getattr(args, 'start', None), end=getattr(args, 'end', None))
+    if getattr(args, 'load', True):
+        ledger.load()
+    try:
+        return args.func(ledger, args) or 0
+    except (ValueError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""Chunked export of transactions as CSV (optionally gzip or zstd compressed), Feather or Parquet"""
+import gzip
+import os
+
+from money import to_dollars
+
+# Rows converted and written at a time, which bounds the memory an export needs
+CHUNK_ROWS = 100_000
+
+# File name endings and the format each writes
+EXPORT_FORMATS = {
+    ".csv": "CSV",
+    ".csv.gz": "gzip compressed CSV",
+    ".csv.zst": "zstd compressed CSV (requires zstandard)",
+    ".feather": "Feather (requires pyarrow)",
+    ".parquet": "Parquet (requires pyarrow)",
+}
+
+
+def export_format(path):
+    """The EXPORT_FORMATS ending of path; anything else is written as plain CSV"""
+    name = path.lower()
+    for ending in sorted(EXPORT_FORMATS, key=len, reverse=True):
+        if name.endswith(ending):
+            return ending
+    return ".csv"
+
+
+def export_chunks(df, positions=None, chunk_rows=CHUNK_ROWS):
+    """Rows at positions (every row when None) as frames of at most chunk_rows, amounts in dollars
+
+    Only the chunk being converted is copied, so a filtered export never
+    builds a filtered copy of the whole ledger. An empty selection yields
+    one empty frame so the output still gets its header or schema.
+    """
+    total = len(df) if positions is None else len(positions)
+    for start in range(0, max(total, 1), chunk_rows):
+        if positions is None:
+            chunk = df.iloc[start:start + chunk_rows]
+        else:
+            chunk = df.take(positions[start:start + chunk_rows])
+        rows = chunk.drop(columns='amount_cents')
+        rows.insert(3, 'amount', to_dollars(chunk['amount_cents']))
+        yield rows
+
+
+def write_export(df, path, positions=None, progress=None, chunk_rows=CHUNK_ROWS):
+    """Write the rows at positions (every row when None) to path in the format its name ends with
+
+    The file is written to a temporary name and moved into place once
+    complete, so a failed export never leaves a truncated file behind.
+    progress(text) is called after each chunk. Returns the number of rows
+    written.
+    """
+    ending = export_format(path)
+    total = len(df) if positions is None else len(positions)
+
+    def reporting(chunks):
+        written = 0
+        for chunk in chunks:
+            yield chunk
+            written += len(chunk)
+            if progress is not None:
+                progress(f"Exporting... {written:,} of {total:,} rows")
+
+    chunks = reporting(export_chunks(df, positions, chunk_rows))
+    tmp = path + ".tmp"
+    try:
+        if ending in (".feather", ".parquet"):
+            _write_arrow(chunks, tmp, ending)
+        else:
+            with _open_text(tmp, ending) as f:
+                for i, chunk in enumerate(chunks):
+                    chunk.to_csv(f, header=i == 0, index=False)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return total
+
+
+def _open_text(path, ending):
+    if ending == ".csv.gz":
+        # Level 6 compresses nearly as well as the default 9 in a fraction of the time
+        return gzip.open(path, "wt", compresslevel=6, newline="")
+    if ending == ".csv.zst":
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("zstd export requires the 'zstandard' package (pip install zstandard)")
+        return zstandard.open(path, "wt", newline="")
+    return open(path, "w", newline="")
+
+
+def _write_arrow(chunks, path, ending):
+    """Append each chunk as a record batch; Feather is the Arrow IPC file format"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError(f"{ending[1:].capitalize()} export requires the 'pyarrow' package (pip install pyarrow)")
+
+    writer = None
+    schema = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                if ending == ".parquet":
+                    writer = pq.ParquetWriter(path, schema)
+                else:
+                    compression = "lz4" if pa.Codec.is_available("lz4") else None
+                    writer = pa.ipc.new_file(path, schema, options=pa.ipc.IpcWriteOptions(compression=compression))
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
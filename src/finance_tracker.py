@@ -1,54 +1,147 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
 import os
-from datetime import datetime
+from ledger import Ledger, run_now
+from downsample import lttb
+from export import write_export
+from money import format_cents, parse_cents, to_dollars
+from profiling import PROFILE, Profiler
+from worker import BackgroundWorker
+
+# Set FINANCE_TRACKER_DEBUG=1 to verify incremental aggregates against a full recompute
+DEBUG = bool(os.environ.get("FINANCE_TRACKER_DEBUG"))
 
 
 class FinanceTracker:
-    def __init__(self, root):
+    def __init__(self, root, data_folder="data"):
         self.root = root
         self.root.title("Personal Finance Tracker")
         self.root.geometry("1200x800")
         self.root.configure(bg="#f0f0f0")
         
-        # Data file paths
-        self.data_folder = "data"
-        os.makedirs(self.data_folder, exist_ok=True)
-        self.data_file = os.path.join(self.data_folder, "finance_data.csv")
-        
-        
-        #Initialize data
-        self.df = self.load_data()
+        # The ledger starts empty and is loaded on the worker thread once the
+        # window is up; its disk writes are queued on the worker's io lane
+        self.worker = BackgroundWorker(self.root, on_busy=self.show_busy)
+        self.ledger = Ledger(data_folder, run_io=self.run_io)
+        # Running statement import, whose journaled rows on_import_done adds to the ledger
+        self._import = None
+        
+        # Virtual transaction list state: the filtered row positions currently
+        # listed and the first row on screen
+        self._list_order = np.empty(0, dtype=np.intp)
+        self._list_key = None
+        self._list_offset = 0
+        self._visible_rows = 15
+        self._selected_keys = set()
+        
+        # Views waiting to be redrawn and the pending after_idle callback
+        self._dirty_views = set()
+        self._refresh_pending = None
+        
+        # Opt-in timing of the hot paths, shown in the status bar
+        self.profiler = None
+        if PROFILE:
+            self.enable_profiling()
         
         # Create main interface
         self.create_widgets()
-        self.update_total_display()
-        self.update_transaction_list()
-        self.update_chart()
+        self.schedule_refresh('totals', 'list', 'chart')
+        self.load_data()
+        
+        # Fold the journal back into the data file on exit
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
     def load_data(self):
-        """Load financial data from CSV file or create new DataFrame"""
-        if os.path.exists(self.data_file):
-            try:
-                df = pd.read_csv(self.data_file)
-                df['date'] = pd.to_datetime(df['date'])
-                return df
-            except Exception as e:
-                messagebox.showerror("Error", f"Error loading data: {str(e)}")
-                
-        # Create new DataFrame if file doesn't exist
-        return pd.DataFrame(columns=['date', 'description', 'category', 'amount', 'type'])
+        """Load the data and build the aggregates on the worker thread"""
+        self.set_data_buttons_state(tk.DISABLED)
+        self.worker.submit(self.ledger.read, description="Loading data...",
+                           on_done=self.on_data_loaded, on_error=self.on_load_error)
+    
+    def on_data_loaded(self, data):
+        self.ledger.install(data)
+        self.set_data_buttons_state(tk.NORMAL)
+        self.schedule_refresh('totals', 'list', 'chart')
+    
+    def on_load_error(self, error):
+        # The buttons stay disabled: changes made to an empty ledger would get
+        # ids already used in the data file and be dropped by the next load
+        messagebox.showerror("Error", f"Error loading data: {str(error)}\n\n"
+                                      "Editing is disabled to protect the data file; restart the tracker to retry.")
+    
+    def run_io(self, job, description=None):
+        """Run the ledger's disk writes in order on the worker thread"""
+        self.worker.submit(job, description=description, on_error=self.on_save_error)
     
     def save_data(self):
-        """Save data to CSV file"""
+        """Rewrite the data file with all data and empty the journal, on the worker thread"""
+        self.ledger.save()
+    
+    def on_save_error(self, error):
+        messagebox.showerror("Error", f"Error saving data: {str(error)}")
+    
+    def on_close(self):
+        # Let queued saves finish, then fold the journal into the data file
+        self.worker.shutdown()
+        # Nothing more can be queued on the worker, so write on this thread
+        self.ledger.run_io = run_now
         try:
-            self.df.to_csv(self.data_file, index=False)
+            if self._import is not None:
+                # The import's rows are journaled but on_import_done never ran;
+                # add them so compacting doesn't discard them with the journal
+                self.ledger.add_rows(self._import.result())
+            self.ledger.compact()
         except Exception as e:
             messagebox.showerror("Error", f"Error saving data: {str(e)}")
+        self.root.destroy()
+    
+    def enable_profiling(self):
+        """Time the list, chart and persistence paths; must run before the widgets are created"""
+        self.profiler = Profiler()
+        rows = lambda: len(self.ledger.df)
+        names = [name for name in dir(self) if name.startswith('update_')
+                 or (name.startswith('create_') and name.endswith('_chart'))]
+        names += ['load_data', 'save_data', 'render_transaction_window', 'get_chart_data', 'draw_chart']
+        self.profiler.instrument(self, names, rows=rows)
+        self.profiler.instrument(self.ledger, ['install', 'save', 'add', 'delete', 'add_rows', 'list_order'],
+                                 rows=rows)
+        # Reading and writing the data file run on the worker thread, where the
+        # ledger's row count may not match the data being read
+        self.profiler.instrument(self.ledger, ['read'])
+        self.profiler.instrument(self.ledger.storage, ['read', 'write'], prefix='storage')
+    
+    def refresh_profile_overlay(self):
+        spans = self.profiler.last(4)
+        self.profile_var.set("  |  ".join(span.label() for span in spans))
+        self.root.after(500, self.refresh_profile_overlay)
+    
+    def export_trace(self):
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("Trace files", "*.json"), ("All files", "*.*")]
+        )
+        if file_path:
+            try:
+                count = self.profiler.write_trace(file_path)
+                messagebox.showinfo("Success", f"{count} timings written to {file_path}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Error writing trace: {str(e)}")
+    
+    def set_data_buttons_state(self, state):
+        for button in self.data_buttons:
+            button.config(state=state)
+    
+    def show_busy(self, description):
+        """Show what the worker thread is doing in the status bar"""
+        if description:
+            self.status_var.set(description)
+            self.progress.pack(side=tk.RIGHT, padx=10)
+            self.progress.start(10)
+        else:
+            self.status_var.set("Ready")
+            self.progress.stop()
+            self.progress.pack_forget()
     
     def create_widgets(self):
         """Create all GUI widgets"""
@@ -57,6 +150,9 @@ class FinanceTracker:
                               font=("Arial", 20, "bold"), bg="#f0f0f0", fg="#2c3e50")
         title_label.pack(pady=10)
         
+        # Status bar with a busy indicator for background jobs
+        self.create_status_bar()
+        
         # Main container
         main_frame = tk.Frame(self.root, bg="#f0f0f0")
         main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
@@ -76,14 +172,36 @@ class FinanceTracker:
         right_panel.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, pady=5)
         
         # Create notebook for tabs
-        notebook = ttk.Notebook(right_panel)
-        notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.notebook = ttk.Notebook(right_panel)
+        self.notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
         # Transaction list tab
-        self.create_transaction_tab(notebook)
+        self.create_transaction_tab(self.notebook)
         
         # Charts tab
-        self.create_chart_tab(notebook)
+        self.create_chart_tab(self.notebook)
+        
+        # Views postponed while their tab was hidden are drawn when it is shown
+        self.notebook.bind('<<NotebookTabChanged>>', lambda e: self.schedule_refresh())
+    
+    def create_status_bar(self):
+        """Create the status bar at the bottom of the window"""
+        status_frame = tk.Frame(self.root, bg="#f0f0f0")
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=20, pady=(0, 5))
+        
+        self.status_var = tk.StringVar(value="Ready")
+        tk.Label(status_frame, textvariable=self.status_var, bg="#f0f0f0", fg="#7f8c8d",
+                 anchor=tk.W).pack(side=tk.LEFT)
+        self.progress = ttk.Progressbar(status_frame, mode="indeterminate", length=120)
+        
+        # Latest timings when profiling, newest first
+        if self.profiler is not None:
+            tk.Button(status_frame, text="Save Trace", command=self.export_trace,
+                      font=("Arial", 8)).pack(side=tk.RIGHT)
+            self.profile_var = tk.StringVar()
+            tk.Label(status_frame, textvariable=self.profile_var, bg="#f0f0f0", fg="#8e44ad",
+                     font=("Courier", 8), anchor=tk.E).pack(side=tk.RIGHT, padx=10)
+            self.refresh_profile_overlay()
     
     def create_balance_display(self, parent):
         """Create the current balance display section"""
@@ -147,6 +265,9 @@ class FinanceTracker:
                               relief=tk.FLAT, pady=5)
         add_button.pack(fill=tk.X, pady=10)
         
+        # Buttons that change or read the data are disabled while it loads
+        self.data_buttons = [add_button]
+        
         # Quick actions frame
         actions_frame = tk.Frame(input_frame, bg="#ffffff")
         actions_frame.pack(fill=tk.X, pady=(10, 0))
@@ -154,15 +275,23 @@ class FinanceTracker:
         export_btn = tk.Button(actions_frame, text="Export Data", command=self.export_data,
                               bg="#95a5a6", fg="white", relief=tk.FLAT)
         export_btn.pack(side=tk.LEFT, padx=(0, 5))
+        self.data_buttons.append(export_btn)
+        
+        import_btn = tk.Button(actions_frame, text="Import", command=self.import_data,
+                              bg="#95a5a6", fg="white", relief=tk.FLAT)
+        import_btn.pack(side=tk.LEFT, padx=(0, 5))
+        self.data_buttons.append(import_btn)
         
         clear_btn = tk.Button(actions_frame, text="Clear All", command=self.clear_all_data,
                              bg="#e74c3c", fg="white", relief=tk.FLAT)
         clear_btn.pack(side=tk.RIGHT, padx=(5, 0))
+        self.data_buttons.append(clear_btn)
     
     def create_transaction_tab(self, notebook):
         """Create the transaction list tab"""
         transaction_frame = tk.Frame(notebook, bg="#ffffff")
         notebook.add(transaction_frame, text="Transactions")
+        self.transaction_frame = transaction_frame
         
         # Search and filter frame
         filter_frame = tk.Frame(transaction_frame, bg="#ffffff")
@@ -175,7 +304,24 @@ class FinanceTracker:
                                           "Utilities", "Healthcare", "Shopping", "Salary", 
                                           "Investment", "Other"])
         filter_combo.pack(side=tk.LEFT, padx=(10, 20))
-        filter_combo.bind('<<ComboboxSelected>>', lambda e: self.update_transaction_list())
+        filter_combo.bind('<<ComboboxSelected>>', lambda e: self.scroll_transaction_list_to_top())
+        
+        # Description search and date range, applied as you type
+        tk.Label(filter_frame, text="Search:", bg="#ffffff").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        tk.Entry(filter_frame, textvariable=self.search_var, width=20).pack(side=tk.LEFT, padx=(10, 20))
+        
+        tk.Label(filter_frame, text="From:", bg="#ffffff").pack(side=tk.LEFT)
+        self.start_date_var = tk.StringVar()
+        self.start_date_entry = tk.Entry(filter_frame, textvariable=self.start_date_var, width=11)
+        self.start_date_entry.pack(side=tk.LEFT, padx=(5, 10))
+        tk.Label(filter_frame, text="To:", bg="#ffffff").pack(side=tk.LEFT)
+        self.end_date_var = tk.StringVar()
+        self.end_date_entry = tk.Entry(filter_frame, textvariable=self.end_date_var, width=11)
+        self.end_date_entry.pack(side=tk.LEFT, padx=(5, 10))
+        
+        for var in (self.search_var, self.start_date_var, self.end_date_var):
+            var.trace_add('write', lambda *args: self.on_list_filter_changed())
         
         refresh_btn = tk.Button(filter_frame, text="Refresh", command=self.update_transaction_list,
                                bg="#3498db", fg="white", relief=tk.FLAT)
@@ -202,23 +348,39 @@ class FinanceTracker:
         self.transaction_tree.column("Amount", width=100)
         self.transaction_tree.column("Type", width=80)
         
-        # Scrollbar for the treeview
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.transaction_tree.yview)
-        self.transaction_tree.configure(yscrollcommand=scrollbar.set)
+        # The tree only holds the rows on screen, so the scrollbar drives our own offset
+        self.list_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.on_list_scroll)
         
         self.transaction_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.list_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.transaction_tree.bind('<Configure>', self.on_list_resize)
+        self.transaction_tree.bind('<MouseWheel>', self.on_list_mousewheel)
+        self.transaction_tree.bind('<Button-4>', self.on_list_mousewheel)
+        self.transaction_tree.bind('<Button-5>', self.on_list_mousewheel)
+        self.transaction_tree.bind('<Up>', lambda e: self.on_list_key(-1))
+        self.transaction_tree.bind('<Down>', lambda e: self.on_list_key(1))
+        self.transaction_tree.bind('<Prior>', lambda e: self.on_list_scroll('scroll', -1, 'pages'))
+        self.transaction_tree.bind('<Next>', lambda e: self.on_list_scroll('scroll', 1, 'pages'))
+        
+        # Keep track of selected rows that are scrolled out of the window
+        self.transaction_tree.bind('<<TreeviewSelect>>', self.on_list_select)
+        self.transaction_tree.bind('<Button-1>', lambda e: self._selected_keys.clear())
+        self.transaction_tree.bind('<Control-Button-1>', lambda e: None)
+        self.transaction_tree.bind('<Shift-Button-1>', lambda e: None)
         
         # Delete button
         delete_btn = tk.Button(transaction_frame, text="Delete Selected", 
                               command=self.delete_transaction,
                               bg="#e74c3c", fg="white", relief=tk.FLAT)
         delete_btn.pack(pady=10)
+        self.data_buttons.append(delete_btn)
     
     def create_chart_tab(self, notebook):
         """Create the charts tab"""
         chart_frame = tk.Frame(notebook, bg="#ffffff")
         notebook.add(chart_frame, text="Charts")
+        self.chart_frame = chart_frame
         
         # Chart controls
         control_frame = tk.Frame(chart_frame, bg="#ffffff")
@@ -226,13 +388,31 @@ class FinanceTracker:
         
         tk.Label(control_frame, text="Chart Type:", bg="#ffffff").pack(side=tk.LEFT)
         self.chart_type_var = tk.StringVar(value="Monthly Expenses")
-        chart_combo = ttk.Combobox(control_frame, textvariable=self.chart_type_var, values=["Monthly Expenses", "Category Breakdown", "Income vs Expenses", "Monthly Income"])
+        chart_combo = ttk.Combobox(control_frame, textvariable=self.chart_type_var, values=["Monthly Expenses", "Category Breakdown", "Income vs Expenses", "Monthly Income", "Balance Over Time"])
         chart_combo.pack(side=tk.LEFT, padx=(10, 20))
-        chart_combo.bind('<<ComboboxSelected>>', lambda e: self.update_chart())
+        chart_combo.bind('<<ComboboxSelected>>', lambda e: self.schedule_refresh('chart'))
+        
+        # The chart canvas is created when the first chart is drawn
+        self.figure = None
+        self.canvas = None
+        self.balance_line = None
+        # Chart currently shown: its type, months or categories, and artists
+        self.chart_state = None
+        self._rescaling = False
+        # Date range (int64 ns) the balance chart is zoomed to, None when it shows everything
+        self._balance_zoom = None
+    
+    def create_chart_canvas(self):
+        """Create the matplotlib figure and canvas"""
+        # matplotlib is only imported once a chart is actually shown
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+        from matplotlib.figure import Figure
         
-        # Chart canvas
         self.figure = Figure(figsize=(10, 6), dpi=80)
-        self.canvas = FigureCanvasTkAgg(self.figure, chart_frame)
+        self.canvas = FigureCanvasTkAgg(self.figure, self.chart_frame)
+        # Zoom and pan; the balance chart is resampled for the zoomed range
+        self.toolbar = NavigationToolbar2Tk(self.canvas, self.chart_frame, pack_toolbar=False)
+        self.toolbar.pack(side=tk.BOTTOM, fill=tk.X, padx=10)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
     
     def add_transaction(self):
@@ -246,35 +426,20 @@ class FinanceTracker:
                 messagebox.showerror("Error", "Please fill in all fields")
                 return
             
-            amount = float(amount_str)
-            if amount <= 0:
+            # Parsed as a decimal straight into cents, so 0.10 stays exactly 10 cents
+            amount_cents = parse_cents(amount_str)
+            if amount_cents <= 0:
                 messagebox.showerror("Error", "Amount must be positive")
                 return
             
-            # For expenses, make amount negative
-            if transaction_type == "expense":
-                amount = -amount
-            
-            # Add to DataFrame
-            new_row = pd.DataFrame({
-                'date': [datetime.now()],
-                'description': [description],
-                'category': [category],
-                'amount': [amount],
-                'type': [transaction_type]
-            })
-            
-            self.df = pd.concat([self.df, new_row], ignore_index=True)
-            self.save_data()
+            self.ledger.add(description, category, amount_cents, transaction_type)
             
             # Clear input fields
             self.desc_entry.delete(0, tk.END)
             self.category_var.set("")
             self.amount_entry.delete(0, tk.END)
             # Update displays
-            self.update_total_display()
-            self.update_transaction_list()
-            self.update_chart()
+            self.schedule_refresh('totals', 'list', 'chart')
 
 
         except ValueError:
@@ -282,19 +447,43 @@ class FinanceTracker:
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
     
+    def schedule_refresh(self, *views):
+        """Mark views as needing a redraw and repaint them once the event loop is idle
+
+        Bursts of changes collapse into a single repaint per view, and views
+        on a hidden notebook tab stay dirty until their tab is selected.
+        """
+        self._dirty_views.update(views)
+        if self._dirty_views and self._refresh_pending is None:
+            self._refresh_pending = self.root.after_idle(self.flush_refresh)
+    
+    def flush_refresh(self):
+        """Redraw the dirty views that are currently visible"""
+        self._refresh_pending = None
+        current_tab = self.notebook.index('current')
+        if 'totals' in self._dirty_views:
+            self._dirty_views.discard('totals')
+            self.update_total_display()
+        if 'list' in self._dirty_views and current_tab == self.notebook.index(self.transaction_frame):
+            self._dirty_views.discard('list')
+            self.update_transaction_list()
+        if 'chart' in self._dirty_views and current_tab == self.notebook.index(self.chart_frame):
+            self._dirty_views.discard('chart')
+            self.update_chart()
+    
     def update_total_display(self):
         """Update the total balance display"""
-        if len(self.df) > 0:
-            total = self.df['amount'].sum()
-            income = self.df[self.df['type'] == 'income']['amount'].sum()
-            expenses = abs(self.df[self.df['type'] == 'expense']['amount'].sum())
-        else:
-            total = income = expenses = 0
+        if DEBUG:
+            self.ledger.check()
+        totals = self.ledger.totals
+        total = totals.total
+        income = totals.income
+        expenses = totals.expenses
         
         # Update labels
-        self.total_label.config(text=f"${total:.2f}")
-        self.income_label.config(text=f"Income: ${income:.2f}")
-        self.expense_label.config(text=f"Expenses: ${expenses:.2f}")
+        self.total_label.config(text=format_cents(total))
+        self.income_label.config(text=f"Income: {format_cents(income)}")
+        self.expense_label.config(text=f"Expenses: {format_cents(expenses)}")
         
         # Change color based on balance
         if total >= 0:
@@ -304,62 +493,301 @@ class FinanceTracker:
     
     def update_transaction_list(self):
         """Update the transaction list display"""
-        # Clear existing items
-        for item in self.transaction_tree.get_children():
-            self.transaction_tree.delete(item)
-        
-        if len(self.df) == 0:
-            return
-        
-        # Filter data if needed
-        filtered_df = self.df.copy()
-        if self.filter_var.get() != "All":
-            filtered_df = filtered_df[filtered_df['category'] == self.filter_var.get()]
-        
-        # Sort by date (most recent first)
-        filtered_df = filtered_df.sort_values('date', ascending=False)
-        
-        # Add items to tree
-        for _, row in filtered_df.iterrows():
-            date_str = row['date'].strftime('%Y-%m-%d')
-            amount_str = f"${abs(row['amount']):.2f}"
-            
-            self.transaction_tree.insert("", "end", values=(
-                date_str, row['description'], row['category'], amount_str, row['type'].title()
-            ))
+        filters = self.list_filters()
+        key = (self.ledger.version, *filters)
+        if key != self._list_key:
+            self._list_order = self.ledger.list_order(*filters)
+            self._list_key = key
+        self.render_transaction_window()
+    
+    def list_filters(self):
+        """Category (None for all), search text and date range the list is filtered by"""
+        category = self.filter_var.get()
+        search = self.search_var.get().strip()
+        start = self.parse_filter_date(self.start_date_var, self.start_date_entry)
+        end = self.parse_filter_date(self.end_date_var, self.end_date_entry)
+        return None if category == "All" else category, search, start, end
+    
+    def parse_filter_date(self, var, entry):
+        """Date typed into a range entry, or None while it is empty or incomplete"""
+        text = var.get().strip()
+        date = None
+        if text:
+            try:
+                date = pd.Timestamp(text)
+            except ValueError:
+                pass
+            if pd.isna(date):
+                date = None
+        entry.config(fg="#e74c3c" if text and date is None else "black")
+        return date
+    
+    def on_list_filter_changed(self):
+        # Repaint once the typing burst is over, from the first match
+        self._list_offset = 0
+        self.schedule_refresh('list')
+    
+    def render_transaction_window(self):
+        """Materialize only the rows currently scrolled into view"""
+        tree = self.transaction_tree
+        total = len(self._list_order)
+        rows = self._visible_rows
+        self._list_offset = max(0, min(self._list_offset, total - rows))
+        
+        positions = self._list_order[self._list_offset:self._list_offset + rows]
+        window = self.ledger.df.iloc[positions]
+        keys = [str(key) for key in window.index]
+        
+        # Format only the visible rows
+        dates = window['date'].dt.strftime('%Y-%m-%d').tolist()
+        amounts = [format_cents(cents) for cents in np.abs(window['amount_cents'].to_numpy())]
+        types = window['type'].astype(str).str.title().tolist()
+        
+        tree.delete(*tree.get_children())
+        for key, values in zip(keys, zip(dates, window['description'], window['category'], amounts, types)):
+            tree.insert("", "end", iid=key, values=values)
+        tree.selection_set([key for key in keys if key in self._selected_keys])
+        
+        if total:
+            self.list_scrollbar.set(self._list_offset / total, (self._list_offset + len(keys)) / total)
+        else:
+            self.list_scrollbar.set(0, 1)
+    
+    def scroll_transaction_list_to_top(self):
+        self._list_offset = 0
+        self.update_transaction_list()
+    
+    def on_list_scroll(self, action, amount, unit=None):
+        """Scrollbar command: move the window over the full list"""
+        total = len(self._list_order)
+        if action == 'moveto':
+            self._list_offset = int(float(amount) * total)
+        elif unit == 'pages':
+            self._list_offset += int(amount) * max(1, self._visible_rows - 1)
+        else:
+            self._list_offset += int(amount)
+        self.render_transaction_window()
+    
+    def on_list_mousewheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.on_list_scroll('scroll', -3, 'units')
+        else:
+            self.on_list_scroll('scroll', 3, 'units')
+        return "break"
+    
+    def on_list_key(self, step):
+        """Scroll the window when the keyboard moves past its first or last row"""
+        tree = self.transaction_tree
+        items = tree.get_children()
+        focus = tree.focus()
+        if not items or focus not in items:
+            return None
+        index = items.index(focus) + step
+        if 0 <= index < len(items):
+            return None
+        
+        self._list_offset += step
+        self._selected_keys.clear()
+        self.render_transaction_window()
+        items = tree.get_children()
+        if items:
+            item = items[0] if step < 0 else items[-1]
+            tree.focus(item)
+            tree.selection_set(item)
+        return "break"
+    
+    def on_list_resize(self, event):
+        """Recompute how many rows fit in the list"""
+        style = ttk.Style()
+        row_height = int(style.lookup("Treeview", "rowheight") or 20)
+        # Leave room for the column headings
+        rows = max(1, (event.height - row_height - 4) // row_height + 1)
+        if rows != self._visible_rows:
+            self._visible_rows = rows
+            self.render_transaction_window()
+    
+    def on_list_select(self, event):
+        visible = set(self.transaction_tree.get_children())
+        self._selected_keys = (self._selected_keys - visible) | set(self.transaction_tree.selection())
     
     def update_chart(self):
         """Update the chart display based on selected type"""
+        if DEBUG:
+            self.ledger.check()
+        
+        # The series are prepared on the worker thread from a copy of the rollup
+        # table; a newer request (e.g. another chart type) supersedes this one
+        chart_type = self.chart_type_var.get()
+        # A zoomed balance chart is refreshed for the range on screen
+        date_range = self._balance_zoom if chart_type == "Balance Over Time" else None
+        self.worker.submit(self.get_chart_data, self.chart_source(chart_type), chart_type, self.chart_width(),
+                           date_range, lane="compute", key="chart",
+                           on_done=lambda data: self.draw_chart(chart_type, data))
+    
+    def chart_source(self, chart_type):
+        """Data a chart is prepared from, safe to hand to the worker thread"""
+        if chart_type == "Balance Over Time":
+            return self.ledger.balance.snapshot()
+        return self.ledger.rollup.copy()
+    
+    def chart_width(self):
+        """Plot width in pixels, the most points worth drawing for a line chart"""
+        if self.canvas is None:
+            return 800
+        return max(100, self.canvas.get_tk_widget().winfo_width())
+    
+    @staticmethod
+    def get_chart_data(source, chart_type, width=800, date_range=None):
+        """Series in dollars plotted by a chart type, or None when there is no data"""
+        if chart_type == "Balance Over Time":
+            return FinanceTracker.get_balance_data(source, width, date_range)
+        rollup = source
+        if not rollup.cells:
+            return None
+        if chart_type == "Monthly Expenses":
+            return to_dollars(rollup.monthly('expense').abs())
+        elif chart_type == "Category Breakdown":
+            return to_dollars(rollup.by_category('expense').abs())
+        elif chart_type == "Income vs Expenses":
+            return to_dollars(rollup.monthly('income')), to_dollars(rollup.monthly('expense').abs())
+        elif chart_type == "Monthly Income":
+            return to_dollars(rollup.monthly('income'))
+    
+    @staticmethod
+    def get_balance_data(snapshot, width, date_range=None):
+        """Running balance reduced to about one point per pixel, optionally for a date range
+
+        The cost depends on the number of transactions in the range only
+        through a few vectorized passes, so drawing time stays flat.
+        """
+        dates, balance = snapshot
+        if len(dates) == 0:
+            return None
+        lo, hi = 0, len(dates)
+        if date_range is not None:
+            # One point beyond each edge so the line runs off the visible range
+            lo = max(int(np.searchsorted(dates, date_range[0])) - 1, 0)
+            hi = min(int(np.searchsorted(dates, date_range[1], side='right')) + 1, len(dates))
+        dates, balance = dates[lo:hi], balance[lo:hi]
+        kept = lttb(dates, balance, width)
+        return dates[kept].view('datetime64[ns]'), to_dollars(balance[kept])
+    
+    def draw_chart(self, chart_type, data):
+        """Draw prepared chart data on the Tk thread
+
+        The chart's artists are kept between refreshes; while the chart type
+        and its months or categories stay the same, only their values are
+        updated and the layout is left alone.
+        """
+        if self.figure is None:
+            self.create_chart_canvas()
+        
+        state = self.chart_state
+        if (data is not None and state is not None and state['type'] == chart_type
+                and state['keys'] == self.chart_keys(chart_type, data)):
+            self.update_chart_artists(chart_type, data)
+            self.canvas.draw_idle()
+            return
+        
         self.figure.clear()
+        self.balance_line = None
+        self._balance_zoom = None
+        self.chart_state = None
 
-        if len(self.df) == 0:
+        if data is None:
             ax = self.figure.add_subplot(111)
             ax.text(0.5, 0.5, 'No data to display', ha='center', va='center', transform=ax.transAxes)
             self.canvas.draw()
             return
 
-        chart_type = self.chart_type_var.get()
-
         if chart_type == "Monthly Expenses":
-            self.create_monthly_chart()
+            artists = self.create_monthly_chart(data)
         elif chart_type == "Category Breakdown":
-            self.create_category_chart()
+            artists = self.create_category_chart(data)
         elif chart_type == "Income vs Expenses":
-            self.create_income_expense_chart()
+            artists = self.create_income_expense_chart(*data)
         elif chart_type == "Monthly Income":
-            self.create_monthly_income_chart()  # <-- Add this line
+            artists = self.create_monthly_income_chart(data)
+        elif chart_type == "Balance Over Time":
+            artists = self.create_balance_chart(*data)
 
+        if artists is not None:
+            self.chart_state = {'type': chart_type, 'keys': self.chart_keys(chart_type, data), 'artists': artists}
         self.canvas.draw()
+        # Start the toolbar's zoom history afresh for the new chart
+        self.toolbar.update()
+    
+    @staticmethod
+    def chart_keys(chart_type, data):
+        """Months or categories a chart shows; the layout only changes when these do"""
+        if chart_type == "Income vs Expenses":
+            monthly_income, monthly_expenses = data
+            return tuple(sorted(set(monthly_income.index) | set(monthly_expenses.index)))
+        if chart_type == "Balance Over Time":
+            return ()
+        return tuple(data.index)
+    
+    def update_chart_artists(self, chart_type, data):
+        """Move the current chart's bars, wedges or line to new values without rebuilding it"""
+        artists = self.chart_state['artists']
+        if chart_type in ("Monthly Expenses", "Monthly Income"):
+            self.set_bar_heights(artists, data.values)
+            self.fit_bars(artists[0].axes, data.values)
+        elif chart_type == "Income vs Expenses":
+            monthly_income, monthly_expenses = data
+            months = self.chart_state['keys']
+            income_values = [monthly_income.get(month, 0) for month in months]
+            expense_values = [monthly_expenses.get(month, 0) for month in months]
+            income_bars, expense_bars = artists
+            self.set_bar_heights(income_bars, income_values)
+            self.set_bar_heights(expense_bars, expense_values)
+            self.fit_bars(income_bars[0].axes, income_values + expense_values)
+        elif chart_type == "Category Breakdown":
+            self.set_pie_values(artists, data.values)
+        elif chart_type == "Balance Over Time":
+            self.balance_line.set_data(*data)
+            if self._balance_zoom is None:
+                ax = self.balance_line.axes
+                # Rescaling to the new data is not a zoom, so don't resample for it
+                self._rescaling = True
+                ax.relim()
+                ax.autoscale_view()
+                self._rescaling = False
+    
+    @staticmethod
+    def set_bar_heights(bars, values):
+        for bar, value in zip(bars, values):
+            bar.set_height(value)
     
-    def create_monthly_chart(self):
+    @staticmethod
+    def fit_bars(ax, values):
+        """Set the y limits autoscaling would give the bars, without relim walking every patch"""
+        top = max(values, default=0)
+        if top > 0:
+            ax.set_ylim(0, top * (1 + ax.margins()[1]))
+    
+    @staticmethod
+    def set_pie_values(artists, values):
+        """Re-angle pie wedges and move their labels as Axes.pie would place them"""
+        wedges, texts, autotexts = artists
+        fractions = np.asarray(values, dtype=float) / np.sum(values)
+        theta2 = 360 * np.cumsum(fractions)
+        theta1 = np.concatenate(([0], theta2[:-1]))
+        for wedge, text, autotext, start, stop, fraction in zip(wedges, texts, autotexts, theta1, theta2, fractions):
+            wedge.set_theta1(start)
+            wedge.set_theta2(stop)
+            middle = np.deg2rad((start + stop) / 2)
+            x, y = np.cos(middle), np.sin(middle)
+            text.set_position((1.1 * x, 1.1 * y))
+            text.set_horizontalalignment('left' if x > 0 else 'right')
+            autotext.set_position((0.6 * x, 0.6 * y))
+            autotext.set_text(f"{100 * fraction:.1f}%")
+    
+    def create_monthly_chart(self, monthly_data):
         """Create monthly expenses chart"""
-        df_expenses = self.df[self.df['type'] == 'expense'].copy()
-        if len(df_expenses) == 0:
+        if len(monthly_data) == 0:
             return
         
-        df_expenses['month'] = df_expenses['date'].dt.to_period('M')
-        monthly_data = df_expenses.groupby('month')['amount'].sum().abs()
-        
         ax = self.figure.add_subplot(111)
         monthly_data.plot(kind='bar', ax=ax, color='#e74c3c')
         ax.set_title('Monthly Expenses', fontsize=14, fontweight='bold')
@@ -367,31 +795,26 @@ class FinanceTracker:
         ax.set_ylabel('Amount ($)')
         ax.tick_params(axis='x', rotation=45)
         self.figure.tight_layout()
+        return ax.containers[0]
     
-    def create_category_chart(self):
+    def create_category_chart(self, category_data):
         """Create category breakdown pie chart"""
-        df_expenses = self.df[self.df['type'] == 'expense'].copy()
-        if len(df_expenses) == 0:
+        if len(category_data) == 0:
             return
         
-        category_data = df_expenses.groupby('category')['amount'].sum().abs()
-        
         ax = self.figure.add_subplot(111)
         colors = ['#ff9999', '#66b3ff', '#99ff99', '#ffcc99', '#ff99cc', '#c2c2f0', '#ffb3e6']
         wedges, texts, autotexts = ax.pie(category_data.values, labels=category_data.index, 
                                          autopct='%1.1f%%', colors=colors)
         ax.set_title('Expenses by Category', fontsize=14, fontweight='bold')
+        return wedges, texts, autotexts
     
-    def create_monthly_income_chart(self):
-        df_income = self.df[self.df['type'] == 'income'].copy()
-        if len(df_income) == 0:
+    def create_monthly_income_chart(self, monthly_data):
+        if len(monthly_data) == 0:
             ax = self.figure.add_subplot(111)
             ax.text(0.5, 0.5, 'No income data to display', ha='center', va='center', transform=ax.transAxes)
             return
 
-        df_income['month'] = df_income['date'].dt.to_period('M')
-        monthly_data = df_income.groupby('month')['amount'].sum()
-
         ax = self.figure.add_subplot(111)
         monthly_data.plot(kind='bar', ax=ax, color='#27ae60')
         ax.set_title('Monthly Income', fontsize=14, fontweight='bold')
@@ -399,14 +822,9 @@ class FinanceTracker:
         ax.set_ylabel('Amount ($)')
         ax.tick_params(axis='x', rotation=45)
         self.figure.tight_layout()
+        return ax.containers[0]
 
-    def create_income_expense_chart(self):
-        df_copy = self.df.copy()
-        df_copy['month'] = df_copy['date'].dt.to_period('M')
-        
-        monthly_income = df_copy[df_copy['type'] == 'income'].groupby('month')['amount'].sum()
-        monthly_expenses = df_copy[df_copy['type'] == 'expense'].groupby('month')['amount'].sum().abs()
-        
+    def create_income_expense_chart(self, monthly_income, monthly_expenses):
         # Align the data
         all_months = sorted(set(monthly_income.index) | set(monthly_expenses.index))
         income_values = [monthly_income.get(month, 0) for month in all_months]
@@ -416,8 +834,8 @@ class FinanceTracker:
         x = range(len(all_months))
         width = 0.35
         
-        ax.bar([i - width/2 for i in x], income_values, width, label='Income', color='#27ae60')
-        ax.bar([i + width/2 for i in x], expense_values, width, label='Expenses', color='#e74c3c')
+        income_bars = ax.bar([i - width/2 for i in x], income_values, width, label='Income', color='#27ae60')
+        expense_bars = ax.bar([i + width/2 for i in x], expense_values, width, label='Expenses', color='#e74c3c')
         
         ax.set_title('Income vs Expenses by Month', fontsize=14, fontweight='bold')
         ax.set_xlabel('Month')
@@ -426,68 +844,139 @@ class FinanceTracker:
         ax.set_xticklabels([str(month) for month in all_months], rotation=45)
         ax.legend()
         self.figure.tight_layout()
+        return income_bars, expense_bars
+    
+    def create_balance_chart(self, dates, balance):
+        """Create the running balance line chart"""
+        ax = self.figure.add_subplot(111)
+        self.balance_line, = ax.plot(dates, balance, color='#2980b9', linewidth=1.5, drawstyle='steps-post')
+        ax.axhline(0, color='#7f8c8d', linewidth=0.8)
+        
+        ax.set_title('Balance Over Time', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Date')
+        ax.set_ylabel('Balance ($)')
+        self.figure.autofmt_xdate()
+        self.figure.tight_layout()
+        
+        # Zooming or panning resamples the visible range at full resolution
+        ax.callbacks.connect('xlim_changed', self.on_balance_zoom)
+        return self.balance_line
+    
+    def on_balance_zoom(self, ax):
+        if self._rescaling:
+            return
+        from matplotlib.dates import num2date
+        
+        start, end = (np.datetime64(num2date(x).replace(tzinfo=None), 'ns').view('int64') for x in ax.get_xlim())
+        snapshot = self.ledger.balance.snapshot()
+        dates = snapshot[0]
+        # Zoomed back out to the whole history (e.g. Home): refreshes rescale again
+        whole = len(dates) == 0 or (start <= dates[0] and end >= dates[-1])
+        self._balance_zoom = None if whole else (start, end)
+        line = self.balance_line
+        # Its own key, so a zoom doesn't cancel a pending refresh of the chart
+        self.worker.submit(self.get_balance_data, snapshot, self.chart_width(), (start, end),
+                           lane="compute", key="balance_zoom",
+                           on_done=lambda data: self.update_balance_line(line, data))
+    
+    def update_balance_line(self, line, data):
+        # Dropped if the chart was redrawn in the meantime
+        if line is not self.balance_line or data is None:
+            return
+        line.set_data(*data)
+        self.canvas.draw_idle()
     
     def delete_transaction(self):
-        selected_item = self.transaction_tree.selection()
-        if not selected_item:
+        # Tree item ids are transaction ids; rows selected and then scrolled
+        # out of view are remembered in _selected_keys
+        selected = self._selected_keys | set(self.transaction_tree.selection())
+        if not selected:
             messagebox.showwarning("Warning", "Please select a transaction to delete")
             return
         
-        if messagebox.askyesno("Confirm", "Are you sure you want to delete this transaction?"):
-            # Get the selected row data
-            item_values = self.transaction_tree.item(selected_item[0])['values']
-            
-            # Find and remove the transaction from DataFrame
-            date_str = item_values[0]
-            description = item_values[1]
-            category = item_values[2]
-            
-            # Convert date string back to datetime for comparison
-            date_obj = pd.to_datetime(date_str)
+        if len(selected) == 1:
+            question = "Are you sure you want to delete this transaction?"
+        else:
+            question = f"Are you sure you want to delete these {len(selected)} transactions?"
+        
+        if messagebox.askyesno("Confirm", question):
+            ids = self.ledger.delete(selected)
+            if not ids:
+                return
+            self._selected_keys.clear()
             
-            # Find matching row and remove it
-            mask = ((self.df['date'].dt.date == date_obj.date()) & 
-                   (self.df['description'] == description) & 
-                   (self.df['category'] == category))
+            # Update displays
+            self.schedule_refresh('totals', 'list', 'chart')
             
-            if mask.any():
-                self.df = self.df[~mask]
-                self.save_data()
-                
-                # Update displays
-                self.update_total_display()
-                self.update_transaction_list()
-                self.update_chart()
-                
+            if len(ids) == 1:
                 messagebox.showinfo("Success", "Transaction deleted successfully!")
+            else:
+                messagebox.showinfo("Success", f"{len(ids)} transactions deleted successfully!")
     
     def export_data(self):
-        if len(self.df) == 0:
+        if len(self.ledger.df) == 0:
             messagebox.showwarning("Warning", "No data to export")
             return
         
+        filters = self.list_filters()
+        only_listed = False
+        if any(filters):
+            only_listed = messagebox.askyesno("Export", "Export only the transactions currently listed?")
+        
         filename = filedialog.asksaveasfilename(
             defaultextension=".csv",
-            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+            filetypes=[("CSV files", "*.csv"), ("Compressed CSV files", "*.csv.gz *.csv.zst"),
+                       ("Feather files", "*.feather"), ("Parquet files", "*.parquet"), ("All files", "*.*")],
             title="Save financial data"
         )
         
         if filename:
-            try:
-                self.df.to_csv(filename, index=False)
-                messagebox.showinfo("Success", f"Data exported to {filename}")
-            except Exception as e:
-                messagebox.showerror("Error", f"Error exporting data: {str(e)}")
+            # Select the rows here; the worker only reads this snapshot of the ledger
+            df = self.ledger.df
+            positions = self.ledger.matching_positions(*filters) if only_listed else None
+            self.worker.submit(write_export, df, filename, positions, self.worker.report_progress,
+                               description="Exporting...",
+                               on_done=lambda rows: messagebox.showinfo("Success", f"{rows} transactions exported to {filename}"),
+                               on_error=lambda e: messagebox.showerror("Error", f"Error exporting data: {str(e)}"))
+    
+    def import_data(self):
+        filename = filedialog.askopenfilename(
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+            title="Import bank statement"
+        )
+        
+        if filename:
+            self.import_statement(filename)
+    
+    def import_statement(self, path):
+        """Stream a bank statement CSV into the ledger in chunks on the worker thread
+
+        Each chunk is journaled as one batch as soon as it is parsed, and the
+        displays are refreshed once when the whole file has been read.
+        """
+        report = self.ledger.new_import_report()
+        self.set_data_buttons_state(tk.DISABLED)
+        self._import = self.worker.submit(self.ledger.read_statement, path, report, self.ledger.next_id(),
+                                          self.worker.report_progress, description="Importing...",
+                                          on_done=lambda rows: self.on_import_done(rows, report))
+    
+    def on_import_done(self, rows, report):
+        self._import = None
+        self.set_data_buttons_state(tk.NORMAL)
+        if rows is not None:
+            self.ledger.add_rows(rows)
+            self.schedule_refresh('totals', 'list', 'chart')
+        if report.error is not None:
+            messagebox.showerror("Error", f"Error importing data: {str(report.error)}\n{report.summary()}")
+        else:
+            messagebox.showinfo("Import", report.summary())
     
     def clear_all_data(self):
         if messagebox.askyesno("Confirm", "Are you sure you want to clear all data? This cannot be undone!"):
-            self.df = pd.DataFrame(columns=['date', 'description', 'category', 'amount', 'type'])
-            self.save_data()
+            self.ledger.clear()
             
             # Update displays
-            self.update_total_display()
-            self.update_transaction_list()
-            self.update_chart()
+            self.schedule_refresh('totals', 'list', 'chart')
             
             messagebox.showinfo("Success", "All data cleared successfully!")
 
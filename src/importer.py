@@ -0,0 +1,153 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from storage import COLUMNS
+
+# Rows parsed per chunk; bounds the memory used while importing a statement
+CHUNK_SIZE = 50_000
+
+# Header names used by common bank exports, matched case-insensitively
+DATE_COLUMNS = ['date', 'transaction date', 'posted date', 'posting date', 'booking date', 'value date']
+DESCRIPTION_COLUMNS = ['description', 'memo', 'payee', 'details', 'narrative', 'name', 'reference']
+CATEGORY_COLUMNS = ['category']
+AMOUNT_COLUMNS = ['amount', 'transaction amount', 'value']
+DEBIT_COLUMNS = ['debit', 'withdrawal', 'withdrawals', 'money out', 'paid out']
+CREDIT_COLUMNS = ['credit', 'deposit', 'deposits', 'money in', 'paid in']
+TYPE_COLUMNS = ['type']
+
+DEFAULT_CATEGORY = "Other"
+
+
+def _find(header, candidates):
+    lookup = {name.strip().lower(): name for name in header}
+    for candidate in candidates:
+        if candidate in lookup:
+            return lookup[candidate]
+    return None
+
+
+def find_columns(header):
+    """Map the columns of a bank statement onto the transaction schema"""
+    columns = {
+        'date': _find(header, DATE_COLUMNS),
+        'description': _find(header, DESCRIPTION_COLUMNS),
+        'category': _find(header, CATEGORY_COLUMNS),
+        'amount': _find(header, AMOUNT_COLUMNS),
+        'debit': _find(header, DEBIT_COLUMNS),
+        'credit': _find(header, CREDIT_COLUMNS),
+        'type': _find(header, TYPE_COLUMNS),
+    }
+    if columns['date'] is None:
+        raise ValueError("No date column found in the statement")
+    if columns['amount'] is None and columns['debit'] is None and columns['credit'] is None:
+        raise ValueError("No amount, debit or credit column found in the statement")
+    return columns
+
+
+def parse_amounts(values):
+    """Parse amount strings such as "$1,234.50" or "(12.00)" in one vectorized pass"""
+    text = values.astype(str).str.strip()
+    text = text.str.replace(r'^\((.*)\)$', r'-\1', regex=True)
+    text = text.str.replace(r'[$£€,\s]', '', regex=True)
+    return pd.to_numeric(text, errors='coerce')
+
+
+def normalize_chunk(chunk, columns):
+    """Convert a chunk of statement rows to the transaction schema
+
+    Returns the valid rows and the rejected raw rows with a reason column.
+    """
+    dates = pd.to_datetime(chunk[columns['date']], errors='coerce')
+
+    if columns['amount'] is not None:
+        amounts = parse_amounts(chunk[columns['amount']])
+    else:
+        amounts = pd.Series(0.0, index=chunk.index)
+        if columns['credit'] is not None:
+            amounts = amounts + parse_amounts(chunk[columns['credit']]).fillna(0).abs()
+        if columns['debit'] is not None:
+            amounts = amounts - parse_amounts(chunk[columns['debit']]).fillna(0).abs()
+
+    if columns['description'] is not None:
+        descriptions = chunk[columns['description']].astype(str).str.strip()
+        descriptions = descriptions.where(chunk[columns['description']].notna(), "")
+    else:
+        descriptions = pd.Series("Imported transaction", index=chunk.index)
+
+    if columns['category'] is not None:
+        categories = chunk[columns['category']].fillna(DEFAULT_CATEGORY).astype(str).str.strip()
+        categories = categories.mask(categories == "", DEFAULT_CATEGORY)
+    else:
+        categories = pd.Series(DEFAULT_CATEGORY, index=chunk.index)
+
+    # An explicit income/expense column decides the sign; otherwise the sign decides the type
+    types = None
+    if columns['type'] is not None:
+        types = chunk[columns['type']].astype(str).str.strip().str.lower()
+        if types.isin(['income', 'expense']).all():
+            amounts = amounts.abs().where(types == 'income', -amounts.abs())
+        else:
+            types = None
+    if types is None:
+        types = pd.Series(np.where(amounts < 0, 'expense', 'income'), index=chunk.index)
+
+    # Whole cents, still as floats so that unparseable amounts stay NaN
+    cents = (amounts * 100).round()
+
+    reason = pd.Series("", index=chunk.index)
+    reason = reason.mask(descriptions == "", "missing description")
+    reason = reason.mask(cents == 0, "zero amount")
+    reason = reason.mask(amounts.isna(), "invalid amount")
+    reason = reason.mask(dates.isna(), "invalid date")
+    valid = reason == ""
+
+    rows = pd.DataFrame({
+        'date': dates[valid],
+        'description': descriptions[valid],
+        'category': categories[valid],
+        'amount_cents': cents[valid].astype('int64'),
+        'type': types[valid],
+    }, columns=COLUMNS)
+    rejected = chunk[~valid].assign(reason=reason[~valid])
+    return rows, rejected
+
+
+def read_statement(path, chunksize=CHUNK_SIZE):
+    """Yield (rows, rejected) pairs for each chunk of a bank statement CSV"""
+    reader = pd.read_csv(path, chunksize=chunksize, dtype=str, skipinitialspace=True)
+    columns = None
+    for chunk in reader:
+        if columns is None:
+            columns = find_columns(chunk.columns)
+        yield normalize_chunk(chunk, columns)
+
+
+class ImportReport:
+    """Counts of imported and rejected rows from one statement"""
+
+    def __init__(self, rejected_file):
+        self.imported = 0
+        self.rejected = 0
+        self.reasons = {}
+        self.rejected_file = rejected_file
+        self.error = None
+
+    def add_rejected(self, rejected):
+        """Count rejected rows and append them to the rejected rows file"""
+        if len(rejected) == 0:
+            return
+        write_header = self.rejected == 0
+        rejected.to_csv(self.rejected_file, mode='w' if write_header else 'a', header=write_header, index=False)
+        self.rejected += len(rejected)
+        for reason, count in rejected['reason'].value_counts().items():
+            self.reasons[reason] = self.reasons.get(reason, 0) + int(count)
+
+    def summary(self):
+        text = f"Imported {self.imported} transactions."
+        if self.rejected:
+            reasons = ", ".join(f"{count} {reason}" for reason, count in self.reasons.items())
+            text += (f"\n{self.rejected} rows were rejected ({reasons})."
+                     f"\nRejected rows were saved to {os.path.abspath(self.rejected_file)}")
+        return text
@@ -0,0 +1,340 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from aggregates import BalanceSeries, LedgerTotals, MonthlyRollup
+from export import write_export
+from importer import ImportReport, read_statement
+from search import DescriptionIndex
+from storage import TransactionJournal, append_rows, between, empty_frame, journal_path, next_id, open_storage
+
+# Number of journal records after which the data file is rewritten
+JOURNAL_COMPACT_THRESHOLD = 1000
+
+
+def run_now(job, description=None):
+    """Default I/O runner: run persistence jobs synchronously"""
+    job()
+
+
+class Ledger:
+    """Transactions with their aggregates and persistence, independent of any GUI
+
+    Changes are applied to the in-memory DataFrame straight away and
+    persisted through run_io(job, description), which runs the job
+    synchronously by default. The GUI passes a runner that queues jobs on
+    its worker thread; jobs must run in the order they are submitted.
+    """
+
+    def __init__(self, data_folder="data", run_io=run_now, start=None, end=None):
+        self.data_folder = data_folder
+        os.makedirs(self.data_folder, exist_ok=True)
+        self.storage = open_storage(self.data_folder)
+        self.journal = TransactionJournal(journal_path(self.data_folder))
+        # Changes go to the journal, unless the storage persists each change itself
+        self.changes = self.storage if self.storage.logs_changes else self.journal
+        self.run_io = run_io
+        # Optional date range to load; a partial ledger never rewrites the data file
+        self.start = start
+        self.end = end
+
+        self.df = empty_frame()
+        self.totals = LedgerTotals()
+        self.rollup = MonthlyRollup()
+        self.search = DescriptionIndex()
+        self.balance = BalanceSeries()
+        # Bumped on every change so views can cache derived data
+        self.version = 0
+        # False until the whole data file has been read; only individual changes
+        # are written before that, so an unreadable or partly loaded data file
+        # is never replaced
+        self.loaded = False
+        # Row positions sorted newest first, built lazily
+        self._date_order = None
+        # Smallest id never handed out; ids of deleted transactions are not reused
+        self._next_id = 1
+
+    def read(self):
+        """Read the data file, replay the journal and build the aggregates
+
+        Touches no ledger state apart from the journal, so it can run on a
+        worker thread; pass the result to install().
+        """
+        if self.storage.exists():
+            stored = self.storage.read(self.start, self.end)
+            rollup = self.storage.rollup(stored)
+        else:
+            stored = empty_frame()
+            rollup = MonthlyRollup()
+        df = self.journal.replay(stored)
+        next_free_id = max(self.journal.next_free_id, next_id(df))
+        if df is not stored:
+            df = between(df, self.start, self.end)
+            # Only the rows the journal touched need patching in the stored rollup:
+            # their stored version (if any) comes out and their final version goes in
+            changed = list(self.journal.changed_ids)
+            rollup.remove_rows(stored[stored.index.isin(changed)])
+            rollup.add_rows(df[df.index.isin(changed)])
+        return df, LedgerTotals(df), rollup, DescriptionIndex(df['description']), BalanceSeries(df), next_free_id
+
+    def install(self, data):
+        """Replace the ledger's data with the result of read()"""
+        self.df, self.totals, self.rollup, self.search, self.balance, self._next_id = data
+        self.loaded = self.start is None and self.end is None
+        self._replaced()
+
+    def load(self):
+        self.install(self.read())
+        return self
+
+    def save(self):
+        """Rewrite the data file with all data and empty the journal"""
+        df = self.df
+        next_free_id = self._next_id
+
+        def save():
+            self.storage.write(df)
+            self.journal.clear(next_free_id)
+
+        self.run_io(save, "Saving...")
+
+    def _save_change(self, log, *args):
+        """Persist a change, rewriting the data file once the journal has grown large
+
+        The DataFrame captured here holds exactly the changes journaled so
+        far, because persistence jobs run in submission order.
+        """
+        df = self.df
+        loaded = self.loaded
+        next_free_id = self._next_id
+
+        def save():
+            log(*args)
+            if loaded and self.journal.records >= JOURNAL_COMPACT_THRESHOLD:
+                self.storage.write(df)
+                self.journal.clear(next_free_id)
+
+        self.run_io(save)
+
+    def compact(self):
+        """Fold the journal into the data file now, if there is anything to fold"""
+        if self.loaded and self.journal.records:
+            self.storage.write(self.df)
+            self.journal.clear(self._next_id)
+
+    def next_id(self):
+        """Smallest id not yet used or reserved; add() and imports reserve theirs from here"""
+        return max(self._next_id, self.storage.next_id())
+
+    def _replaced(self):
+        self.version += 1
+        self._date_order = None
+
+    def add(self, description, category, amount_cents, transaction_type, date=None):
+        """Add a transaction; amount_cents is a positive integer and its sign comes from the type
+
+        Returns the new transaction's id.
+        """
+        description = description.strip()
+        category = category.strip()
+        if not description or not category:
+            raise ValueError("Description and category are required")
+        amount_cents = int(amount_cents)
+        if amount_cents <= 0:
+            raise ValueError("Amount must be positive")
+        if transaction_type not in ("income", "expense"):
+            raise ValueError(f"Unknown transaction type: {transaction_type}")
+
+        # For expenses, make amount negative
+        if transaction_type == "expense":
+            amount_cents = -amount_cents
+
+        date = date or datetime.now()
+        transaction_id = self.storage.reserve_ids(1, self._next_id)
+        self._next_id = transaction_id + 1
+        new_row = pd.DataFrame({
+            'date': [date],
+            'description': [description],
+            'category': [category],
+            'amount_cents': [amount_cents],
+            'type': [transaction_type]
+        }, index=pd.Index([transaction_id], name='id'))
+
+        self.df = append_rows(self.df, new_row)
+        self.totals.add(amount_cents, category)
+        self.rollup.add(date, category, transaction_type, amount_cents)
+        self.search.add_rows([description])
+        self.balance.add(date, transaction_id, amount_cents)
+        self.version += 1
+
+        # The new row is normally the most recent one, so it goes first in the sorted index
+        order = self._date_order
+        if order is not None and (len(order) == 0 or date >= self.df['date'].iat[order[0]]):
+            self._date_order = np.concatenate(([len(self.df) - 1], order))
+        else:
+            self._date_order = None
+
+        # Persist just this change (a journal record or a database row) instead of rewriting the data file
+        self._save_change(self.changes.log_add, transaction_id, date, description, category,
+                          amount_cents, transaction_type)
+        return transaction_id
+
+    def delete(self, ids):
+        """Delete transactions by id in a single pass; returns the ids that existed"""
+        ids = [int(i) for i in ids]
+        # Look up the rows through the id index instead of scanning the DataFrame
+        positions = self.df.index.get_indexer(ids)
+        ids = [i for i, position in zip(ids, positions) if position >= 0]
+        if not ids:
+            return []
+        positions = np.sort(positions[positions >= 0])
+
+        removed = self.df.iloc[positions]
+        self.totals.remove_rows(removed)
+        self.rollup.remove_rows(removed)
+        self.search.remove_positions(positions)
+        self.balance.remove_ids(ids)
+        self.df = self.df.drop(ids)
+        self.version += 1
+
+        # Drop the deleted rows from the sorted index and shift the positions after them
+        order = self._date_order
+        if order is not None:
+            order = order[~np.isin(order, positions)]
+            self._date_order = order - np.searchsorted(positions, order)
+
+        self._save_change(self.changes.log_delete, ids)
+        return ids
+
+    def clear(self):
+        """Delete every transaction"""
+        self.df = empty_frame()
+        self.totals.reset()
+        self.rollup.reset()
+        self.search.reset()
+        self.balance.reset()
+        self._replaced()
+        self.save()
+
+    def read_statement(self, path, report, first_id, progress=None):
+        """Parse a bank statement in chunks, journaling each chunk as it is read
+
+        Returns the new rows (or None) for add_rows(). Like read(), this only
+        touches the journal, so it can run on a worker thread. A parse error
+        is stored on the report; chunks journaled before it are still returned.
+        """
+        chunks = []
+        transaction_id = first_id
+        try:
+            for rows, rejected in read_statement(path):
+                if len(rows):
+                    transaction_id = self.storage.reserve_ids(len(rows), transaction_id)
+                    rows.index = pd.RangeIndex(transaction_id, transaction_id + len(rows), name='id')
+                    transaction_id += len(rows)
+                    self.changes.log_add_rows(rows)
+                    chunks.append(rows)
+                report.imported += len(rows)
+                report.add_rejected(rejected)
+                if progress is not None:
+                    progress(f"Importing... {report.imported} rows")
+        except Exception as e:
+            report.error = e
+        return pd.concat(chunks) if chunks else None
+
+    def add_rows(self, rows):
+        """Add rows already persisted by read_statement(), then fold the journal into the data file once"""
+        if rows is None or len(rows) == 0:
+            return
+        self.df = append_rows(self.df, rows)
+        self._next_id = max(self._next_id, int(rows.index.max()) + 1)
+        rows = self.df.iloc[len(self.df) - len(rows):]
+        self.totals.add_rows(rows)
+        self.rollup.add_rows(rows)
+        self.search.add_rows(rows['description'])
+        self.balance.add_rows(rows)
+        self._replaced()
+        if self.loaded and self.changes is self.journal:
+            self.save()
+
+    def new_import_report(self):
+        return ImportReport(os.path.join(self.data_folder, "import_rejected.csv"))
+
+    def import_statement(self, path):
+        """Import a bank statement synchronously and return the ImportReport"""
+        report = self.new_import_report()
+        self.add_rows(self.read_statement(path, report, self.next_id()))
+        return report
+
+    def date_order(self):
+        """Row positions sorted newest first"""
+        if self._date_order is None:
+            # Stable sort so that transactions on the same date stay newest first
+            dates = self.df['date'].to_numpy(dtype='datetime64[ns]').view('i8')
+            self._date_order = np.argsort(dates, kind='stable')[::-1]
+        return self._date_order
+
+    def list_order(self, category=None, search=None, start=None, end=None):
+        """Row positions to list, newest first
+
+        Optionally limited to one category, to descriptions containing
+        search (case-insensitive) and to dates from start up to and
+        including the day end.
+        """
+        order = self.date_order()
+        matches = self._matches(category, search, start, end)
+        if matches is not None:
+            order = order[matches[order]]
+        return order
+
+    def matching_positions(self, category=None, search=None, start=None, end=None):
+        """Row positions matching the list_order filters in ledger order, or None when nothing is filtered"""
+        matches = self._matches(category, search, start, end)
+        return None if matches is None else np.flatnonzero(matches)
+
+    def _matches(self, category, search, start, end):
+        """Boolean mask of the rows passing the filters, or None without any"""
+        matches = None
+        if category is not None:
+            matches = (self.df['category'] == category).to_numpy()
+        if search:
+            found = self.search.mask(search)
+            matches = found if matches is None else matches & found
+        if start is not None or end is not None:
+            dates = self.df['date'].to_numpy(dtype='datetime64[ns]')
+            in_range = np.ones(len(dates), dtype=bool)
+            if start is not None:
+                in_range &= dates >= np.datetime64(pd.Timestamp(start).normalize())
+            if end is not None:
+                in_range &= dates < np.datetime64(pd.Timestamp(end).normalize() + pd.Timedelta(days=1))
+            matches = in_range if matches is None else matches & in_range
+        return matches
+
+    def find(self, category=None, search=None, start=None, end=None, limit=None):
+        """Transactions matching the filters, newest first
+
+        Storages that can query (SQLite) answer this without loading the
+        ledger; otherwise it is loaded if needed and filtered in memory.
+        """
+        if self.changes is self.storage and not self.loaded:
+            return self.storage.query(category, search, start, end, limit)
+        if not self.loaded:
+            self.load()
+        order = self.list_order(category, search, start, end)
+        return self.df.iloc[order[:limit]]
+
+    def export(self, path, category=None, search=None, start=None, end=None, progress=None):
+        """Write the transactions matching the filters to path, with amounts in dollars
+
+        The format follows the file name (see export.EXPORT_FORMATS) and
+        rows are written in chunks; returns the number of rows exported.
+        """
+        return write_export(self.df, path, self.matching_positions(category, search, start, end), progress)
+
+    def check(self):
+        """Debug check of the incremental aggregates against a full recompute"""
+        self.totals.check(self.df)
+        self.rollup.check(self.df)
+        self.search.check(self.df)
+        self.balance.check(self.df)
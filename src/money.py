@@ -0,0 +1,49 @@
+"""Amounts are held as int64 cents; these helpers convert at the input, display and export edges"""
+from decimal import Decimal, InvalidOperation
+
+import numpy as np
+import pandas as pd
+
+
+def parse_cents(text):
+    """Parse a dollar amount typed by the user ("12.5", "$1,234.56") into integer cents
+
+    Raises ValueError for anything that isn't a number with at most two decimals.
+    """
+    cleaned = str(text).strip().replace("$", "").replace(",", "")
+    try:
+        value = Decimal(cleaned)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {text}")
+    if not value.is_finite():
+        raise ValueError(f"Invalid amount: {text}")
+    cents = value * 100
+    if cents != cents.to_integral_value():
+        raise ValueError(f"Amounts can have at most two decimals: {text}")
+    return int(cents)
+
+
+def to_cents(amounts):
+    """Convert float dollar amounts to int64 cents, e.g. from data written before amounts were stored in cents
+
+    Doubles parsed from two-decimal text are within half a cent of the
+    exact value, so rounding recovers it exactly.
+    """
+    values = pd.to_numeric(pd.Series(amounts), errors='raise').to_numpy(dtype='float64')
+    return np.round(values * 100).astype('int64')
+
+
+def to_dollars(cents):
+    """Float dollars (Series, array or scalar) for charts and exports
+
+    cents / 100 is the double nearest the exact amount, so it prints as the
+    original two-decimal value.
+    """
+    return cents / 100
+
+
+def format_cents(cents):
+    """Format cents as "$1,234.56" (or "-$1,234.56") without going through floats"""
+    cents = int(cents)
+    text = f"${abs(cents) // 100:,}.{abs(cents) % 100:02d}"
+    return "-" + text if cents < 0 else text
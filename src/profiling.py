@@ -0,0 +1,115 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Set FINANCE_TRACKER_PROFILE=1 to time the GUI's hot paths
+PROFILE = bool(os.environ.get("FINANCE_TRACKER_PROFILE"))
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def rss_bytes():
+    """Resident set size of this process, or None where /proc is not available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Span:
+    __slots__ = ("name", "start", "duration", "rows", "memory", "thread")
+
+    def __init__(self, name, start, duration, rows, memory, thread):
+        self.name = name
+        self.start = start
+        self.duration = duration
+        self.rows = rows
+        self.memory = memory
+        self.thread = thread
+
+    def label(self):
+        text = f"{self.name} {self.duration * 1000:.1f} ms"
+        if self.memory:
+            text += f" {self.memory / 2**20:+.1f} MB"
+        return text
+
+
+class Profiler:
+    """Records how long instrumented methods take
+
+    Nothing is patched until instrument() is called, so a disabled profiler
+    costs nothing: the app simply doesn't call it. Spans are kept in a
+    bounded buffer and can be written as a Chrome trace (chrome://tracing,
+    Perfetto or speedscope) with write_trace().
+    """
+
+    def __init__(self, max_spans=10_000):
+        self.spans = deque(maxlen=max_spans)
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def instrument(self, obj, names, prefix=None, rows=None):
+        """Replace obj's methods `names` with timed wrappers on the instance
+
+        rows() is called after each call to record how many rows were involved.
+        """
+        prefix = prefix or type(obj).__name__
+        for name in names:
+            method = getattr(obj, name)
+            setattr(obj, name, self.wrap(method, f"{prefix}.{name}", rows))
+
+    def wrap(self, func, name, rows=None):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            memory = rss_bytes()
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                duration = time.perf_counter() - start
+                after = rss_bytes()
+                self.record(Span(name, start - self._origin, duration, rows() if rows else None,
+                                 after - memory if after is not None and memory is not None else None,
+                                 threading.current_thread().name))
+        return timed
+
+    def record(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def last(self, count):
+        """The most recent spans, newest first"""
+        with self._lock:
+            spans = list(self.spans)[-count:]
+        return spans[::-1]
+
+    def write_trace(self, path):
+        """Write the recorded spans in the Chrome trace event format"""
+        with self._lock:
+            spans = list(self.spans)
+        threads = {}
+        events = []
+        for span in spans:
+            tid = threads.setdefault(span.thread, len(threads) + 1)
+            events.append({
+                'name': span.name,
+                'ph': 'X',
+                'ts': span.start * 1e6,
+                'dur': span.duration * 1e6,
+                'pid': os.getpid(),
+                'tid': tid,
+                'args': {'rows': span.rows, 'memory_delta': span.memory},
+            })
+        for thread, tid in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid,
+                           'args': {'name': thread}})
+        with open(path, "w") as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return len(spans)
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+# Queries shorter than this are matched by scanning the distinct descriptions
+TRIGRAM = 3
+
+
+def _trigrams(text):
+    return {text[i:i + TRIGRAM] for i in range(len(text) - TRIGRAM + 1)}
+
+
+class DescriptionIndex:
+    """Case-insensitive substring search over transaction descriptions
+
+    Ledgers repeat the same merchants over and over, so each distinct
+    description gets a code and a trigram index is kept over the distinct
+    descriptions only. row_codes holds the description code of every row in
+    DataFrame order; a query finds the matching codes through the trigram
+    index and then selects rows with a single lookup-table gather instead
+    of a string scan over every row.
+    """
+
+    def __init__(self, descriptions=None):
+        self.reset()
+        if descriptions is not None:
+            self.add_rows(descriptions)
+
+    def reset(self):
+        self.descriptions = []
+        self.codes = {}
+        self.trigrams = {}
+        self.row_codes = np.empty(0, dtype=np.int32)
+
+    def _code(self, description):
+        code = self.codes.get(description)
+        if code is None:
+            code = len(self.descriptions)
+            self.codes[description] = code
+            self.descriptions.append(description.lower())
+            for trigram in _trigrams(description.lower()):
+                self.trigrams.setdefault(trigram, set()).add(code)
+        return code
+
+    def add_rows(self, descriptions):
+        """Index rows appended to the end of the ledger"""
+        # Factorize first so each distinct description is looked up once
+        row_codes, uniques = pd.factorize(pd.Series(descriptions, dtype=object).astype(str))
+        codes = np.array([self._code(description) for description in uniques], dtype=np.int32)
+        self.row_codes = np.concatenate((self.row_codes, codes[row_codes]))
+
+    def remove_positions(self, positions):
+        """Forget deleted rows; their descriptions stay in the vocabulary"""
+        self.row_codes = np.delete(self.row_codes, positions)
+
+    def matching_codes(self, query):
+        """Codes of the distinct descriptions containing query"""
+        query = query.strip().lower()
+        if len(query) < TRIGRAM:
+            return [code for code, text in enumerate(self.descriptions) if query in text]
+        candidates = None
+        for trigram in sorted(_trigrams(query), key=lambda t: len(self.trigrams.get(t, ()))):
+            codes = self.trigrams.get(trigram)
+            if not codes:
+                return []
+            candidates = set(codes) if candidates is None else candidates & codes
+            if not candidates:
+                return []
+        # Trigrams can match out of order, so confirm the candidates
+        return [code for code in candidates if query in self.descriptions[code]]
+
+    def mask(self, query):
+        """Boolean mask over the rows whose description contains query"""
+        table = np.zeros(len(self.descriptions), dtype=bool)
+        table[self.matching_codes(query)] = True
+        return table[self.row_codes]
+
+    def check(self, df):
+        """Debug check that the row codes still line up with the DataFrame"""
+        if len(self.row_codes) != len(df):
+            raise AssertionError(f"Search index out of sync: {len(self.row_codes)} rows != {len(df)}")
+        indexed = [self.descriptions[code] for code in self.row_codes]
+        if indexed != df['description'].astype(str).str.lower().tolist():
+            raise AssertionError("Search index out of sync: descriptions differ")
@@ -0,0 +1,743 @@
+import json
+import os
+import shutil
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from aggregates import MonthlyRollup
+from money import to_cents
+
+# Amounts are signed int64 cents: negative for expenses, positive for income
+COLUMNS = ['date', 'description', 'category', 'amount_cents', 'type']
+
+# Columns with few distinct values, held as categorical codes
+CATEGORY_COLUMNS = ['category', 'type']
+
+
+def normalize(df):
+    """Coerce a transactions DataFrame to the compact in-memory dtypes, indexed by id
+
+    Data written before transactions had ids gets sequential ids in file
+    order, and float dollar amounts from before amounts were stored in cents
+    are converted to cents.
+    """
+    if 'amount_cents' not in df.columns and 'amount' in df.columns:
+        df = df.assign(amount_cents=to_cents(df['amount']))
+    if 'id' in df.columns:
+        df = df.set_index('id')
+    elif df.index.name != 'id':
+        df = df.set_axis(pd.RangeIndex(1, len(df) + 1, name='id'))
+    df = df[COLUMNS].copy()
+    df.index = df.index.astype('int64')
+    df['date'] = pd.to_datetime(df['date'], format='ISO8601')
+    df['amount_cents'] = df['amount_cents'].astype('int64')
+    for col in CATEGORY_COLUMNS:
+        df[col] = df[col].astype('category')
+    return df
+
+
+def empty_frame():
+    """Empty transactions DataFrame with the in-memory dtypes"""
+    return normalize(pd.DataFrame(columns=COLUMNS))
+
+
+def next_id(df):
+    """Id for the next transaction added to df"""
+    return int(df.index.max()) + 1 if len(df) else 1
+
+
+def append_rows(df, rows):
+    """Concatenate new rows onto df without losing the categorical columns"""
+    rows = normalize(rows)
+    df = df.copy(deep=False)
+    for col in CATEGORY_COLUMNS:
+        new_categories = rows[col].cat.categories.difference(df[col].cat.categories)
+        if len(new_categories):
+            df[col] = df[col].cat.add_categories(new_categories)
+        rows[col] = rows[col].cat.set_categories(df[col].cat.categories)
+    return pd.concat([df, rows])
+
+
+def between(df, start=None, end=None):
+    """Rows dated from start up to and including the day end"""
+    if start is not None:
+        df = df[df['date'] >= pd.Timestamp(start).normalize()]
+    if end is not None:
+        df = df[df['date'] < pd.Timestamp(end).normalize() + pd.Timedelta(days=1)]
+    return df
+
+
+def match_transaction(df, date, description, category):
+    """Boolean mask of rows matching a date, description and category
+
+    Only used to replay journals written before transactions had ids.
+    """
+    date_obj = pd.to_datetime(date)
+    return ((df['date'].dt.date == date_obj.date()) &
+            (df['description'] == description) &
+            (df['category'] == category))
+
+
+class CsvStorage:
+    """Transactions stored as a plain CSV file"""
+
+    name = "csv"
+    extension = ".csv"
+    # Storages that persist each change themselves take the journal's place
+    logs_changes = False
+
+    def __init__(self, path):
+        self.path = path
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def next_id(self):
+        """Smallest id unused by other processes sharing the storage; files are never shared"""
+        return 1
+
+    def reserve_ids(self, count, at_least):
+        """First of count consecutive ids from at_least on, reserved against other processes sharing the storage
+
+        Files are never shared, so at_least itself is always free.
+        """
+        return at_least
+
+    def read(self, start=None, end=None):
+        """Read the transactions, optionally only those dated from start to end"""
+        df = pd.read_csv(self.path)
+        if 'id' in df.columns and 'amount_cents' in df.columns:
+            return between(normalize(df), start, end)
+        # Upgrade files written before transactions had ids, so the ids
+        # referenced by the journal are persisted, and files with float amounts
+        df = normalize(df)
+        self.write(df)
+        return between(df, start, end)
+
+    def rollup(self, df):
+        """Monthly rollup of the DataFrame returned by read()"""
+        return MonthlyRollup(df)
+
+    def write(self, df):
+        # Write to a temporary file first so a crash never leaves a half-written data file
+        tmp_file = self.path + ".tmp"
+        self._write(df, tmp_file)
+        os.replace(tmp_file, self.path)
+
+    def _write(self, df, path):
+        df.to_csv(path)
+
+
+class FeatherStorage(CsvStorage):
+    """Transactions stored in the columnar Feather format (requires pyarrow)
+
+    Dates are kept as native timestamps and category/type as dictionary
+    encoded columns, so loading skips text parsing entirely.
+    """
+
+    name = "feather"
+    extension = ".feather"
+
+    def read(self, start=None, end=None):
+        feather = _import_feather()
+        table = feather.read_table(self.path, memory_map=True)
+        df = normalize(table.to_pandas())
+        if 'amount_cents' not in table.column_names:
+            self.write(df)
+        return between(df, start, end)
+
+    def _write(self, df, path):
+        feather = _import_feather()
+        feather.write_feather(df.reset_index(), path)
+
+
+def _import_feather():
+    try:
+        from pyarrow import feather
+    except ImportError:
+        raise RuntimeError("Feather storage requires the 'pyarrow' package (pip install pyarrow)")
+    return feather
+
+
+def month_keys(df):
+    """Month of each row as "YYYY-MM" codes plus the distinct months, without per-row strftime"""
+    codes, months = pd.factorize(df['date'].to_numpy(dtype='datetime64[M]'))
+    return codes, np.datetime_as_string(months, unit='M')
+
+
+def partition_fingerprints(df):
+    """Order-independent content hash of each month's rows, keyed by "YYYY-MM"
+
+    Used to tell which partitions an edit touched without comparing files.
+    """
+    if len(df) == 0:
+        return {}
+    row_hashes = pd.util.hash_array(df.index.to_numpy(dtype='int64'))
+    for values in (df['date'].to_numpy(dtype='datetime64[ns]').view('i8'),
+                   df['amount_cents'].to_numpy(dtype='int64'),
+                   df['description'].astype(str).to_numpy(dtype=object),
+                   df['category'].astype(str).to_numpy(dtype=object),
+                   df['type'].astype(str).to_numpy(dtype=object)):
+        row_hashes = row_hashes * np.uint64(1_000_003) ^ pd.util.hash_array(values)
+    codes, months = month_keys(df)
+    sums = np.zeros(len(months), dtype=np.uint64)
+    np.add.at(sums, codes, row_hashes)
+    return {month: str(total) for month, total in zip(months, sums)}
+
+
+def summarize_partition(df):
+    """Rollup cells of one partition as [category, type, cents, count] lists"""
+    grouped = df.groupby(['category', 'type'], observed=True)['amount_cents'].agg(['sum', 'count'])
+    return [[category, transaction_type, int(amount), int(count)]
+            for (category, transaction_type), (amount, count) in grouped.iterrows()]
+
+
+def summarize_months(df):
+    """Rollup cells of every month in df, keyed by "YYYY-MM", from a single groupby"""
+    codes, months = month_keys(df)
+    grouped = df.groupby([codes, 'category', 'type'], observed=True)['amount_cents'].agg(['sum', 'count'])
+    cells = {month: [] for month in months}
+    for (code, category, transaction_type), (amount, count) in grouped.iterrows():
+        cells[months[code]].append([category, transaction_type, int(amount), int(count)])
+    return cells
+
+
+def _summarize_partition_file(path):
+    """Read one partition file and summarize it"""
+    df = normalize(pd.read_csv(path))
+    return summarize_partition(df), partition_fingerprints(df)
+
+
+class PartitionedStorage(CsvStorage):
+    """Transactions stored as one CSV file per month in a folder
+
+    Writing compares a content fingerprint of each month with the one
+    recorded for its file and only rewrites the months that changed. A
+    summary file caches each partition's fingerprint and rollup cells,
+    keyed on the file's size and modification time, so the monthly rollup
+    is built without aggregating unchanged months again.
+    """
+
+    name = "partitioned"
+    extension = ".months"
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.summary_path = os.path.join(path, "summaries.json")
+        self._summaries = None
+        self._months_read = None
+        # Months whose rows the last read() returned in full
+        self._whole_months = set()
+
+    def exists(self):
+        return os.path.isdir(self.path)
+
+    def partition_path(self, month):
+        return os.path.join(self.path, month + ".csv")
+
+    def months(self):
+        """Months with a partition file, oldest first"""
+        if not self.exists():
+            return []
+        return sorted(name[:-4] for name in os.listdir(self.path)
+                      if name.endswith(".csv") and not name.startswith("."))
+
+    def read(self, start=None, end=None):
+        """Read the partitions overlapping start..end, skipping the other months' files"""
+        first = pd.Timestamp(start).strftime('%Y-%m') if start is not None else None
+        last = pd.Timestamp(end).strftime('%Y-%m') if end is not None else None
+        months = [month for month in self.months()
+                  if (first is None or month >= first) and (last is None or month <= last)]
+        self._months_read = months
+        # The first and last month may be cut by the date range
+        self._whole_months = {month for month in months if month not in (first, last)}
+        frames = [pd.read_csv(self.partition_path(month)) for month in months]
+        if not frames:
+            return empty_frame()
+        return between(normalize(pd.concat(frames, ignore_index=True)), start, end)
+
+    def _load_summaries(self):
+        if self._summaries is None:
+            try:
+                with open(self.summary_path, encoding="utf-8") as f:
+                    self._summaries = json.load(f)
+            except (OSError, ValueError):
+                self._summaries = {}
+        return self._summaries
+
+    def _save_summaries(self):
+        tmp_file = self.summary_path + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(self._summaries, f)
+        os.replace(tmp_file, self.summary_path)
+
+    def _file_signature(self, month):
+        stat = os.stat(self.partition_path(month))
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _is_current(self, month):
+        summary = self._load_summaries().get(month)
+        return summary is not None and summary['file'] == self._file_signature(month)
+
+    def refresh_summaries(self, months, df=None):
+        """Recompute the cached summaries of partitions changed outside the tracker
+
+        Partitions whose rows are all in df, the frame read() returned, are
+        summarized from it without touching the files again. The rest (at
+        most the two months a date range cuts through) are read from disk.
+        """
+        summaries = self._load_summaries()
+        stale = [month for month in months if not self._is_current(month)]
+        if not stale:
+            return
+        results = {}
+        loaded = [month for month in stale if month in self._whole_months] if df is not None else []
+        if loaded:
+            cells = summarize_months(df)
+            fingerprints = partition_fingerprints(df)
+            for month in loaded:
+                results[month] = (cells.get(month, []), fingerprints)
+        unread = [month for month in stale if month not in results]
+        for month in unread:
+            results[month] = _summarize_partition_file(self.partition_path(month))
+        for month in stale:
+            cells, fingerprints = results[month]
+            summaries[month] = {'file': self._file_signature(month), 'fingerprint': fingerprints.get(month),
+                                'cells': cells}
+        self._save_summaries()
+
+    def rollup(self, df):
+        """Monthly rollup of the partitions last read, merged from their cached summaries"""
+        months = self._months_read if self._months_read is not None else self.months()
+        self.refresh_summaries(months, df)
+        summaries = self._load_summaries()
+        rollup = MonthlyRollup()
+        for month in months:
+            period = pd.Period(month, 'M')
+            for category, transaction_type, amount, count in summaries[month]['cells']:
+                key = (period, category, transaction_type)
+                rollup.cells[key] = amount
+                rollup.counts[key] = count
+        if len(df) != sum(rollup.counts.values()):
+            # A date range cut through a partition; summarize just the rows read
+            return MonthlyRollup(df)
+        return rollup
+
+    def write(self, df):
+        """Rewrite the partitions whose rows changed and remove months left empty"""
+        os.makedirs(self.path, exist_ok=True)
+        summaries = self._load_summaries()
+        existing = set(self.months())
+        for month in existing:
+            if month in summaries and not self._is_current(month):
+                del summaries[month]
+
+        fingerprints = partition_fingerprints(df)
+        changed = [month for month, fingerprint in fingerprints.items()
+                   if month not in existing or summaries.get(month, {}).get('fingerprint') != fingerprint]
+        codes, months = month_keys(df)
+        for code in np.flatnonzero(np.isin(months, changed)):
+            month = str(months[code])
+            rows = df[codes == code]
+            path = self.partition_path(month)
+            self._write(rows, path + ".tmp")
+            os.replace(path + ".tmp", path)
+            summaries[month] = {'file': self._file_signature(month), 'fingerprint': fingerprints[month],
+                                'cells': summarize_partition(rows)}
+        for month in existing - set(fingerprints):
+            os.remove(self.partition_path(month))
+            summaries.pop(month, None)
+        self._save_summaries()
+
+
+class SQLiteStorage(CsvStorage):
+    """Transactions stored in an SQLite database in WAL mode
+
+    Every add and delete is its own small transaction instead of a
+    journal record plus periodic rewrites, so there is nothing to compact,
+    and WAL lets other processes read while one writes. Date ranges,
+    filters, sorting and the monthly rollup are answered by SQL using the
+    indexes on date, category and type.
+
+    A connection is opened per operation, so the storage can be used from
+    the worker thread and the Tk thread alike.
+    """
+
+    name = "sqlite"
+    extension = ".sqlite"
+    logs_changes = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            description TEXT NOT NULL,
+            category TEXT NOT NULL,
+            amount_cents INTEGER NOT NULL,
+            type TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS transactions_date ON transactions (date);
+        CREATE INDEX IF NOT EXISTS transactions_category ON transactions (category, date);
+        CREATE INDEX IF NOT EXISTS transactions_type ON transactions (type, date);
+    """
+    INSERT = "INSERT INTO transactions (id, date, description, category, amount_cents, type) VALUES (?, ?, ?, ?, ?, ?)"
+
+    def __init__(self, path):
+        super().__init__(path)
+        # Date range of the last read(), which rollup() aggregates over
+        self._range = (None, None)
+
+    def connect(self):
+        new = not self.exists()
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if new:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+        return conn
+
+    @staticmethod
+    def _where(category=None, search=None, start=None, end=None):
+        clauses = []
+        params = []
+        if category is not None:
+            clauses.append("category = ?")
+            params.append(category)
+        if search:
+            clauses.append("description LIKE ? ESCAPE '\\'")
+            escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(f"%{escaped}%")
+        if start is not None:
+            clauses.append("date >= ?")
+            params.append(_sql_date(pd.Timestamp(start).normalize()))
+        if end is not None:
+            clauses.append("date < ?")
+            params.append(_sql_date(pd.Timestamp(end).normalize() + pd.Timedelta(days=1)))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _select(self, sql, params):
+        conn = self.connect()
+        try:
+            return normalize(pd.read_sql_query(sql, conn, params=params))
+        finally:
+            conn.close()
+
+    def read(self, start=None, end=None):
+        self._range = (start, end)
+        where, params = self._where(start=start, end=end)
+        return self._select(f"SELECT * FROM transactions{where} ORDER BY id", params)
+
+    def query(self, category=None, search=None, start=None, end=None, limit=None):
+        """Matching transactions newest first, filtered and sorted by SQLite without loading the rest"""
+        where, params = self._where(category, search, start, end)
+        sql = f"SELECT * FROM transactions{where} ORDER BY date DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return self._select(sql, params)
+
+    def rollup(self, df):
+        """Monthly rollup of the rows last read, aggregated by SQLite"""
+        where, params = self._where(start=self._range[0], end=self._range[1])
+        conn = self.connect()
+        try:
+            cursor = conn.execute(f"SELECT substr(date, 1, 7), category, type, SUM(amount_cents), COUNT(*) "
+                                  f"FROM transactions{where} GROUP BY 1, 2, 3", params)
+            rollup = MonthlyRollup()
+            for month, category, transaction_type, amount, count in cursor:
+                key = (pd.Period(month, 'M'), category, transaction_type)
+                rollup.cells[key] = amount
+                rollup.counts[key] = count
+            return rollup
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _largest_id(conn):
+        largest = conn.execute("SELECT MAX(id) FROM transactions").fetchone()[0] or 0
+        try:
+            # AUTOINCREMENT keeps the largest id ever inserted or reserved here, even once it is deleted
+            row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'transactions'").fetchone()
+        except sqlite3.OperationalError:
+            # Databases created before the table used AUTOINCREMENT
+            row = None
+        return max(largest, row[0] if row else 0)
+
+    def next_id(self):
+        """One past the largest id ever stored or reserved, so ids deleted by any instance are not handed out again"""
+        conn = self.connect()
+        try:
+            return self._largest_id(conn) + 1
+        finally:
+            conn.close()
+
+    def reserve_ids(self, count, at_least):
+        """First of count consecutive ids from at_least on, reserved against other processes sharing the storage
+
+        The ids are picked and recorded in sqlite_sequence in one write
+        transaction, so two instances never get the same id even though
+        the rows themselves are inserted later by the io worker.
+        """
+        conn = self.connect()
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                first = max(self._largest_id(conn) + 1, at_least)
+                try:
+                    last = first + count - 1
+                    if not conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'transactions'",
+                                        (last,)).rowcount:
+                        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('transactions', ?)", (last,))
+                except sqlite3.OperationalError:
+                    # Databases created before the table used AUTOINCREMENT cannot record reservations
+                    pass
+                return first
+        finally:
+            conn.close()
+
+    def _execute(self, sql, rows):
+        """Run one statement for each row inside a single transaction"""
+        conn = self.connect()
+        try:
+            with conn:
+                conn.executemany(sql, rows)
+        finally:
+            conn.close()
+
+    def write(self, df):
+        """Replace every stored transaction with df in one transaction"""
+        conn = self.connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM transactions")
+                conn.executemany(self.INSERT, _sql_rows(df))
+        finally:
+            conn.close()
+
+    def log_add(self, transaction_id, date, description, category, amount_cents, transaction_type):
+        self._execute(self.INSERT, [(int(transaction_id), _sql_date(pd.Timestamp(date)), description, category,
+                                     int(amount_cents), transaction_type)])
+
+    def log_add_rows(self, rows):
+        self._execute(self.INSERT, _sql_rows(rows))
+
+    def log_delete(self, transaction_ids):
+        self._execute("DELETE FROM transactions WHERE id = ?", [(int(i),) for i in transaction_ids])
+
+
+def _sql_date(timestamp):
+    return timestamp.strftime('%Y-%m-%dT%H:%M:%S.%f')
+
+
+def _sql_rows(df):
+    """Parameter tuples for SQLiteStorage.INSERT, formatted with vectorized conversions"""
+    dates = np.datetime_as_string(df['date'].to_numpy(dtype='datetime64[us]'), unit='us')
+    return zip(df.index.tolist(), dates.tolist(), df['description'].astype(str).tolist(),
+               df['category'].astype(str).tolist(), df['amount_cents'].tolist(), df['type'].astype(str).tolist())
+
+
+STORAGE_TYPES = {cls.name: cls for cls in (CsvStorage, FeatherStorage, PartitionedStorage, SQLiteStorage)}
+
+
+def storage_path(data_folder, name):
+    return os.path.join(data_folder, "finance_data" + STORAGE_TYPES[name].extension)
+
+
+def open_storage(data_folder):
+    """Return the storage for the data file present in data_folder, CSV by default"""
+    for name in ("sqlite", "partitioned", "feather", "csv"):
+        storage = STORAGE_TYPES[name](storage_path(data_folder, name))
+        if storage.exists():
+            return storage
+    return CsvStorage(storage_path(data_folder, "csv"))
+
+
+class TransactionJournal:
+    """Append-only log of the changes made since the data file was last written"""
+
+    def __init__(self, path):
+        self.path = path
+        self.records = 0
+        # One past the largest id the journal has seen, set by replay(); a
+        # cleared journal keeps it in a 'next_id' record so deleted ids are
+        # never handed out again
+        self.next_free_id = 1
+        # Ids added or deleted by the records replay() applied
+        self.changed_ids = set()
+
+    def append(self, record):
+        """Durably append a single record to the journal"""
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.records += 1
+
+    def log_add(self, transaction_id, date, description, category, amount_cents, transaction_type):
+        self.append({
+            'op': 'add',
+            'id': transaction_id,
+            'date': date.isoformat(),
+            'description': description,
+            'category': category,
+            'amount_cents': amount_cents,
+            'type': transaction_type
+        })
+
+    def log_add_rows(self, rows):
+        """Append a batch of new transactions as a single columnar record"""
+        self.append({
+            'op': 'add_rows',
+            'ids': rows.index.tolist(),
+            'date': rows['date'].dt.strftime('%Y-%m-%dT%H:%M:%S.%f').tolist(),
+            'description': rows['description'].astype(str).tolist(),
+            'category': rows['category'].astype(str).tolist(),
+            'amount_cents': rows['amount_cents'].tolist(),
+            'type': rows['type'].astype(str).tolist()
+        })
+        self.records += len(rows) - 1
+
+    def log_delete(self, transaction_ids):
+        self.append({'op': 'delete', 'ids': [int(i) for i in transaction_ids]})
+
+    def read(self):
+        """Read all records, ignoring a final line torn by a crash mid-write
+
+        An add_rows record holds many transactions, so it is counted once
+        here; self.records is kept in transactions by replay.
+        """
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        records = []
+        for i, line in enumerate(lines):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                if i == len(lines) - 1:
+                    break
+                raise
+        return records
+
+    def replay(self, df):
+        """Apply the journal on top of the DataFrame loaded from the data file"""
+        records = [self._upgrade(record) for record in self.read()]
+        self.next_free_id = 1
+        for record in records:
+            if record['op'] == 'next_id':
+                self.next_free_id = max(self.next_free_id, record['id'])
+            elif 'ids' in record:
+                self.next_free_id = max(self.next_free_id, max(record['ids'], default=0) + 1)
+            elif record.get('id') is not None:
+                self.next_free_id = max(self.next_free_id, record['id'] + 1)
+        records = [record for record in records if record['op'] != 'next_id']
+        self.records = sum(len(r['ids']) if r['op'] == 'add_rows' else 1 for r in records)
+        self.changed_ids = set()
+        if not records:
+            return df
+
+        # Ids already in the data file; a compaction interrupted after the
+        # data file was replaced leaves adds that are already applied
+        pending = []
+        pending_ids = set()
+        for record in records:
+            if record['op'] == 'add':
+                transaction_id = record.get('id')
+                if transaction_id is None:
+                    transaction_id = max(next_id(df), max(pending_ids, default=0) + 1)
+                    self.next_free_id = max(self.next_free_id, transaction_id + 1)
+                self.changed_ids.add(transaction_id)
+                if transaction_id in pending_ids or transaction_id in df.index:
+                    continue
+                pending_ids.add(transaction_id)
+                pending.append({**record, 'id': transaction_id, 'date': pd.Timestamp(record['date'])})
+            elif record['op'] == 'add_rows':
+                df = self._apply_adds(df, pending)
+                pending = []
+                pending_ids = set()
+                self.changed_ids.update(record['ids'])
+                rows = pd.DataFrame({col: record[col] for col in COLUMNS},
+                                    index=pd.Index(record['ids'], name='id'))
+                df = append_rows(df, rows[~rows.index.isin(df.index)])
+            elif record['op'] == 'delete':
+                df = self._apply_adds(df, pending)
+                pending = []
+                pending_ids = set()
+                if 'ids' in record:
+                    self.changed_ids.update(record['ids'])
+                    df = df.drop(record['ids'], errors='ignore')
+                else:
+                    mask = match_transaction(df, record['date'], record['description'], record['category'])
+                    self.changed_ids.update(df.index[mask].tolist())
+                    df = df[~mask]
+        return self._apply_adds(df, pending)
+
+    @staticmethod
+    def _upgrade(record):
+        """Convert the float amounts of records journaled before amounts were stored in cents"""
+        if 'amount' in record and 'amount_cents' not in record:
+            amounts = record.pop('amount')
+            if record['op'] == 'add':
+                record['amount_cents'] = int(to_cents([amounts])[0])
+            else:
+                record['amount_cents'] = to_cents(amounts).tolist()
+        return record
+
+    @staticmethod
+    def _apply_adds(df, pending):
+        if not pending:
+            return df
+        return append_rows(df, pd.DataFrame(pending, columns=['id'] + COLUMNS))
+
+    def clear(self, next_free_id=None):
+        """Discard the journal once its records are in the data file
+
+        next_free_id, when given, is kept as the journal's only record so
+        the ids of deleted transactions stay used.
+        """
+        if next_free_id is None or next_free_id <= 1:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        else:
+            tmp_file = self.path + ".tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                f.write(json.dumps({'op': 'next_id', 'id': int(next_free_id)}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.path)
+            self.next_free_id = max(self.next_free_id, int(next_free_id))
+        self.records = 0
+
+
+def journal_path(data_folder):
+    return os.path.join(data_folder, "finance_data.journal")
+
+
+def migrate(data_folder, target):
+    """One-shot conversion of the data folder to another storage format
+
+    The journal is folded in and the previous data file is kept with a
+    .bak suffix.
+    """
+    source = open_storage(data_folder)
+    if source.name == target:
+        return source
+    journal = TransactionJournal(journal_path(data_folder))
+    df = source.read() if source.exists() else empty_frame()
+    df = journal.replay(df)
+    next_free_id = max(journal.next_free_id, next_id(df), source.next_id() if source.exists() else 1)
+
+    destination = STORAGE_TYPES[target](storage_path(data_folder, target))
+    destination.write(df)
+    journal.clear(next_free_id)
+    if source.exists():
+        if os.path.isdir(source.path + ".bak"):
+            shutil.rmtree(source.path + ".bak")
+        os.replace(source.path, source.path + ".bak")
+    return destination
+
@@ -0,0 +1,106 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BackgroundWorker:
+    """Runs jobs off the Tk thread and hands their results back to it
+
+    Each lane is a single worker thread, so jobs in the same lane run in
+    submission order (the "io" lane keeps journal appends and data file
+    rewrites ordered). Submitting a job with a key supersedes any earlier
+    job with the same key: it is cancelled if it has not started yet and
+    its result is dropped otherwise.
+
+    Tk widgets must only be touched from the Tk thread, so finished jobs
+    are collected in a queue that is polled with root.after.
+    """
+
+    def __init__(self, root, lanes=("io", "compute"), on_busy=None, poll_ms=50):
+        self.root = root
+        self.on_busy = on_busy
+        self.poll_ms = poll_ms
+        self.executors = {lane: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"finance-{lane}")
+                          for lane in lanes}
+        self.results = queue.Queue()
+        self._latest = {}
+        self._active = {}
+        self._counter = 0
+        self._polling = False
+        self._progress = None
+
+    def submit(self, func, *args, lane="io", key=None, description=None, on_done=None, on_error=None):
+        """Run func(*args) in a lane and call on_done(result) or on_error(exc) on the Tk thread"""
+        self._counter += 1
+        job_id = self._counter
+        if key is not None:
+            previous = self._latest.get(key)
+            if previous is not None:
+                previous.cancel()
+        future = self.executors[lane].submit(func, *args)
+        if key is not None:
+            self._latest[key] = future
+        self._active[job_id] = description
+        future.add_done_callback(lambda f: self.results.put((job_id, key, f, on_done, on_error)))
+        self._update_busy()
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+        return future
+
+    def report_progress(self, text):
+        """Update the busy description from a running job (safe to call from any thread)"""
+        self.results.put(text)
+
+    def _poll(self):
+        # A callback that raises propagates to Tk's error reporting, but
+        # polling always carries on so later results are still delivered
+        try:
+            self._deliver()
+        finally:
+            self._update_busy()
+            if self._active:
+                self.root.after(self.poll_ms, self._poll)
+            else:
+                self._polling = False
+
+    def _deliver(self):
+        while True:
+            try:
+                item = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, str):
+                self._progress = item
+                continue
+            job_id, key, future, on_done, on_error = item
+            self._active.pop(job_id, None)
+            superseded = key is not None and self._latest.get(key) is not future
+            if key is not None and not superseded:
+                del self._latest[key]
+            if future.cancelled() or superseded:
+                continue
+            error = future.exception()
+            if error is not None:
+                if on_error is not None:
+                    on_error(error)
+            elif on_done is not None:
+                on_done(future.result())
+
+    def _update_busy(self):
+        if not self._active:
+            self._progress = None
+        if self.on_busy is not None:
+            descriptions = [d for d in self._active.values() if d]
+            if descriptions and self._progress:
+                self.on_busy(self._progress)
+            else:
+                self.on_busy(descriptions[-1] if descriptions else None)
+
+    @property
+    def busy(self):
+        return bool(self._active)
+
+    def shutdown(self):
+        """Wait for queued jobs to finish, without delivering their results"""
+        for executor in self.executors.values():
+            executor.shutdown(wait=True)
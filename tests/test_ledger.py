@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ledger import Ledger
+from storage import STORAGE_TYPES, migrate
+
+
+@pytest.fixture(params=sorted(STORAGE_TYPES))
+def data_folder(request, tmp_path):
+    """Data folder holding an empty data file of each storage format"""
+    folder = str(tmp_path / request.param)
+    Ledger(folder).load().save()
+    if request.param != "csv":
+        migrate(folder, request.param)
+    return folder
+
+
+def test_ids_of_deleted_transactions_are_not_reused(data_folder):
+    ledger = Ledger(data_folder).load()
+    ledger.add("A", "Food", 100, "expense")
+    newest = ledger.add("B", "Food", 200, "expense")
+    ledger.save()
+    ledger.delete([newest])
+    assert ledger.add("C", "Food", 300, "expense") > newest
+
+    newest = ledger.df.index.max()
+    ledger.delete([newest])
+    ledger.compact()
+    assert Ledger(data_folder).load().add("D", "Food", 400, "expense") > newest
+
+
+def test_stale_delete_does_not_remove_another_instances_transaction(tmp_path):
+    folder = str(tmp_path)
+    Ledger(folder).load().save()
+    migrate(folder, "sqlite")
+    first = Ledger(folder).load()
+    stale = first.add("A", "Food", 100, "expense")
+    second = Ledger(folder).load()
+
+    first.delete([stale])
+    new = first.add("B", "Food", 200, "expense")
+    second.delete([stale])
+    assert list(Ledger(folder).load().df.index) == [new]
+
+
+def test_instances_adding_before_their_inserts_run_get_distinct_ids(tmp_path):
+    folder = str(tmp_path)
+    Ledger(folder).load().save()
+    migrate(folder, "sqlite")
+    pending = []
+    first = Ledger(folder, run_io=lambda job, *args: pending.append(job)).load()
+    second = Ledger(folder, run_io=lambda job, *args: pending.append(job)).load()
+
+    # Both adds happen before the io worker inserts either row
+    ids = [first.add("A", "Food", 100, "expense"), second.add("B", "Food", 200, "expense")]
+    for job in pending:
+        job()
+    assert ids[0] != ids[1]
+    assert sorted(Ledger(folder).load().df.index) == sorted(ids)
+
+
+def test_rollup_after_reload_with_an_id_deleted_and_added_again(data_folder):
+    ledger = Ledger(data_folder).load()
+    ledger.add("A", "Food", 100, "expense")
+    reused = ledger.add("B", "Rent", 200, "expense")
+    ledger.save()
+    # Journals written before ids were never reused can delete an id and add it again
+    changes = ledger.changes
+    changes.log_delete([reused])
+    changes.log_add(reused, pd.Timestamp("2024-03-01"), "C", "Travel", -300, "expense")
+
+    reloaded = Ledger(data_folder).load()
+    reloaded.check()
+    assert reloaded.rollup.by_category('expense').to_dict() == {'Food': -100, 'Travel': -300}
+
+
+def test_aggregates_survive_random_changes_and_reloads(data_folder):
+    rng = np.random.default_rng(5)
+    ledger = Ledger(data_folder).load()
+    for step in range(60):
+        if len(ledger.df) and rng.random() < 0.4:
+            ledger.delete([rng.choice(ledger.df.index.to_numpy())])
+        else:
+            date = pd.Timestamp("2024-01-01") + pd.Timedelta(days=int(rng.integers(0, 120)))
+            ledger.add(f"T{step}", str(rng.choice(["Food", "Rent"])), int(rng.integers(1, 10_000)),
+                       str(rng.choice(["income", "expense"])), date)
+        if step % 7 == 0:
+            ledger.save()
+        if step % 3 == 0:
+            ledger = Ledger(data_folder).load()
+            ledger.check()
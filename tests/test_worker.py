@@ -0,0 +1,39 @@
+import pytest
+
+from worker import BackgroundWorker
+
+
+class FakeRoot:
+    """Runs root.after callbacks on demand instead of from a Tk main loop"""
+
+    def __init__(self):
+        self.pending = []
+
+    def after(self, ms, callback):
+        self.pending.append(callback)
+
+    def run(self, worker):
+        while self.pending:
+            callback = self.pending.pop(0)
+            for executor in worker.executors.values():
+                executor.submit(lambda: None).result()
+            callback()
+
+
+def test_results_still_arrive_after_a_callback_raises():
+    root = FakeRoot()
+    worker = BackgroundWorker(root)
+
+    def fail(result):
+        raise RuntimeError("callback failed")
+
+    worker.submit(lambda: 1, on_done=fail)
+    with pytest.raises(RuntimeError):
+        root.run(worker)
+
+    delivered = []
+    worker.submit(lambda: 2, on_done=delivered.append)
+    root.run(worker)
+    assert delivered == [2]
+    assert not worker.busy
+    worker.shutdown()